@@ -0,0 +1,52 @@
+"""Общие хуки pytest: отчёт о самых медленных фикстурах."""
+import time
+from collections import defaultdict
+
+import pytest
+
+fixture_durations = defaultdict(float)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--fixture-durations',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Показать N самых медленных фикстур (0 - не показывать).',
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """Накапливает время подготовки фикстуры вместе с её зависимостями."""
+    start = time.perf_counter()
+    yield
+    fixture_durations[fixturedef.argname] += time.perf_counter() - start
+
+
+def pytest_sessionfinish(session):
+    """В воркере pytest-xdist передаёт замеры фикстур контроллеру."""
+    workeroutput = getattr(session.config, 'workeroutput', None)
+    if workeroutput is not None:
+        workeroutput['fixture_durations'] = dict(fixture_durations)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Собирает замеры фикстур, пришедшие от воркеров pytest-xdist."""
+    durations = getattr(node, 'workeroutput', {}).get('fixture_durations', {})
+    for name, duration in durations.items():
+        fixture_durations[name] += duration
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    count = config.getoption('fixture_durations')
+    if not count:
+        return
+    terminalreporter.write_sep('=', f'{count} самых медленных фикстур')
+    slowest = sorted(
+        fixture_durations.items(), key=lambda item: item[1], reverse=True
+    )
+    for name, duration in slowest[:count]:
+        terminalreporter.write_line(f'{duration:8.3f}s {name}')
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 
-from .models import Comment, News
+from .archive import purge_news
+from .models import Comment, CommentArchive, News, Notification
 
 
 class CommentInline(admin.StackedInline):
@@ -10,6 +12,58 @@ class CommentInline(admin.StackedInline):
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    """
+    Новости с числом комментариев больше NEWS_PURGE_ADMIN_THRESHOLD
+    удаляются через purge_news: с архивом и короткими транзакциями.
+    """
     inlines = [
         CommentInline,
     ]
+
+    def is_large(self, obj):
+        return (
+            obj.comment_set.count() > settings.NEWS_PURGE_ADMIN_THRESHOLD
+        )
+
+    def get_deleted_objects(self, objs, request):
+        """Для больших новостей не собираем список всех комментариев."""
+        objs = list(objs)
+        if not any(self.is_large(obj) for obj in objs):
+            return super().get_deleted_objects(objs, request)
+        perms_needed = set()
+        if not request.user.has_perm('news.delete_comment'):
+            perms_needed.add(Comment._meta.verbose_name)
+        model_count = {
+            News._meta.verbose_name_plural: len(objs),
+            Comment._meta.verbose_name_plural: Comment.objects.filter(
+                news__in=objs
+            ).count(),
+        }
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        if self.is_large(obj):
+            purge_news(obj.pk, settings.NEWS_ARCHIVE_ROOT)
+        else:
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        large = [obj.pk for obj in queryset if self.is_large(obj)]
+        for news_id in large:
+            purge_news(news_id, settings.NEWS_ARCHIVE_ROOT)
+        super().delete_queryset(request, queryset.exclude(pk__in=large))
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('comment', 'created', 'attempts', 'sent', 'error')
+    list_filter = ('sent',)
+
+
+@admin.register(CommentArchive)
+class CommentArchiveAdmin(admin.ModelAdmin):
+    list_display = ('table', 'month', 'comments')
+    readonly_fields = ('table', 'comments')
+
+    def has_add_permission(self, request):
+        return False
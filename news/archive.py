@@ -0,0 +1,139 @@
+"""
+Удаление новостей с огромным числом комментариев.
+
+Обычный news.delete() собирает в памяти все зависимые комментарии
+(включая ответы и уведомления) и удаляет их пачками в одной транзакции,
+удерживая блокировку записи SQLite всё это время. Здесь комментарии
+удаляются короткими транзакциями: каждая выбирает пачку, дописывает её
+в сжатый архив JSON Lines и удаляет одним DELETE по id. Размер пачки
+подстраивается так, чтобы транзакция укладывалась в NEWS_PURGE_LOCK_BUDGET
+секунд. Пачки идут по убыванию пути в дереве, поэтому ответы удаляются
+раньше комментариев, на которые они отвечают.
+"""
+import gzip
+import json
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidate_comments_count
+from .models import Comment, News, Notification
+
+COMMENT_FIELDS = (
+    'id', 'news_id', 'author_id', 'parent_id', 'path', 'text', 'created'
+)
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'views')
+MAX_BATCH_SIZE = 900  # SQLite ограничивает число параметров запроса.
+
+
+def archive_path(root, news_id):
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return Path(root) / f'news-{news_id}-{stamp}.jsonl.gz'
+
+
+def write_rows(archive, kind, rows):
+    for row in rows:
+        archive.write(json.dumps(
+            {'type': kind, **row}, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n')
+    archive.flush()
+
+
+def delete_ids(model, ids, column='id'):
+    """Удаляет строки одним запросом, минуя сбор объектов и сигналы."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                connection.ops.quote_name(model._meta.db_table),
+                connection.ops.quote_name(column),
+                ', '.join(['%s'] * len(ids)),
+            ),
+            ids,
+        )
+
+
+def adaptive_batches(step, batch_size, budget):
+    """
+    Вызывает step(batch_size) и отдаёт результаты, пока они не пусты.
+
+    Размер пачки подстраивается так, чтобы каждый вызов укладывался
+    в budget секунд: вдвое меньше, если вызов длился дольше, и вдвое
+    больше (до MAX_BATCH_SIZE), если он занял меньше половины бюджета.
+    """
+    while True:
+        started = time.monotonic()
+        batch = step(batch_size)
+        if not batch:
+            return
+        elapsed = time.monotonic() - started
+        if elapsed > budget:
+            batch_size = max(batch_size // 2, 1)
+        elif elapsed < budget / 2:
+            batch_size = min(batch_size * 2, MAX_BATCH_SIZE)
+        yield batch
+
+
+def delete_batch(news_id, batch_size, archive):
+    """Архивирует и удаляет одну пачку; возвращает её строки."""
+    with transaction.atomic():
+        rows = list(
+            Comment.objects.filter(news_id=news_id)
+            .order_by('-path', '-pk')
+            .values(*COMMENT_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return rows
+        if archive is not None:
+            write_rows(archive, 'comment', rows)
+        ids = [row['id'] for row in rows]
+        delete_ids(Notification, ids, 'comment_id')
+        delete_ids(Comment, ids)
+    return rows
+
+
+def purge_news(news_id, archive_root=None, batch_size=None, budget=None):
+    """
+    Удаляет новость со всеми комментариями короткими транзакциями.
+
+    Если задан archive_root, новость и комментарии (включая перенесённые
+    в холодную таблицу, см. news.tiers) сначала дописываются
+    в архив news-<id>-<время>.jsonl.gz в этом каталоге. Возвращает число
+    удалённых комментариев и путь к архиву (или None).
+    """
+    from .tiers import cold_rows
+
+    batch_size = min(
+        batch_size or settings.NEWS_PURGE_BATCH_SIZE, MAX_BATCH_SIZE
+    )
+    budget = budget or settings.NEWS_PURGE_LOCK_BUDGET
+    news = News.objects.filter(pk=news_id).values(*NEWS_FIELDS).first()
+    if news is None:
+        return 0, None
+    path = None
+    if archive_root is not None:
+        path = archive_path(archive_root, news_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+    deleted = 0
+    authors = set()
+    archive = gzip.open(path, 'at', encoding='utf-8') if path else None
+    with archive or nullcontext():
+        if archive is not None:
+            write_rows(archive, 'news', [news])
+            write_rows(archive, 'comment', cold_rows(news_id))
+        batches = adaptive_batches(
+            lambda size: delete_batch(news_id, size, archive),
+            batch_size, budget,
+        )
+        for rows in batches:
+            deleted += len(rows)
+            authors.update(row['author_id'] for row in rows)
+    # Перенесённые в холодную таблицу комментарии удаляет сигнал.
+    News.objects.filter(pk=news_id).delete()
+    for author_id in authors:
+        invalidate_comments_count(author_id)
+    return deleted, path
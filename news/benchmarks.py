@@ -0,0 +1,218 @@
+"""
+Набор бенчмарков проекта.
+
+Каждый бенчмарк - функция, принимающая опции команды и поток вывода.
+Запуск: python manage.py benchmark <имя>.
+"""
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from statistics import median
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from .models import Comment, News
+from .profanity import BadWordMatcher
+
+User = get_user_model()
+
+MEMORY_VARIANTS = {
+    'models': {'NEWS_PROJECTIONS': False},
+    'projections': {'NEWS_PROJECTIONS': True},
+}
+# Общие кеши страницы новости выключены: иначе повторные запросы
+# отдают готовый HTML и вариант не влияет на замер.
+MEMORY_SETTINGS = {
+    'NEWS_DETAIL_PAGE_CACHE_TIMEOUT': None,
+    'NEWS_DETAIL_CACHE_TIMEOUT': None,
+}
+
+
+def create_test_database():
+    """Создаёт временную тестовую базу, чтобы не трогать рабочую."""
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def seed(news_count, comments_per_news):
+    """Заполняет базу новостями и комментариями от одного автора."""
+    author = User.objects.create(username='Бенчмарк')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 50)
+        for index in range(news_count)
+    )
+    Comment.objects.bulk_create(
+        (
+            Comment(news=news, author=author, text=f'Комментарий {index}')
+            for news in News.objects.all()
+            for index in range(comments_per_news)
+        ),
+        batch_size=500,
+    )
+    Comment.objects.fill_root_paths()
+    Comment.objects.fill_text_html()
+
+
+def measure_requests(client, url, repeat):
+    """Пиковый объём памяти, выделенной за запрос, в байтах."""
+    client.get(url)
+    peaks = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+    return median(peaks)
+
+
+def memory_variant(variant, options):
+    """Замеры одного варианта; выполняется в отдельном процессе."""
+    for name, value in {**MEMORY_SETTINGS, **MEMORY_VARIANTS[variant]}.items():
+        setattr(settings, name, value)
+    create_test_database()
+    seed(settings.NEWS_COUNT_ON_HOME_PAGE, options['comments'])
+    client = Client()
+    news = News.objects.first()
+    return {
+        'variant': variant,
+        'home': measure_requests(
+            client, reverse('news:home'), options['repeat']
+        ),
+        'detail': measure_requests(
+            client,
+            reverse('news:detail', args=(news.pk,)),
+            options['repeat']
+        ),
+        'maxrss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def memory(options, stdout):
+    """
+    Память на запрос для главной страницы и страницы новости.
+
+    Сравнивает полноценные модели и лёгкие проекции (NEWS_PROJECTIONS).
+    Каждый вариант запускается в отдельном процессе, чтобы пиковый RSS
+    не смешивался.
+    """
+    stdout.write(
+        f'{"вариант":<12}{"home, КиБ":>12}{"detail, КиБ":>14}'
+        f'{"max RSS, МиБ":>15}'
+    )
+    for variant in MEMORY_VARIANTS:
+        output = subprocess.run(
+            [
+                sys.executable, 'manage.py', 'benchmark', 'memory',
+                '--variant', variant,
+                '--comments', str(options['comments']),
+                '--repeat', str(options['repeat']),
+            ],
+            capture_output=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        stdout.write(
+            f'{variant:<12}{result["home"] / 1024:>12.1f}'
+            f'{result["detail"] / 1024:>14.1f}'
+            f'{result["maxrss"] / 1024:>15.1f}'
+        )
+
+
+def hasher(options, stdout):
+    """
+    Время хеширования пароля при разном числе итераций PBKDF2.
+
+    Помогает подобрать PASSWORD_HASHER_ITERATIONS под бюджет задержки
+    --budget: печатает медиану по --repeat замерам для каждого значения
+    --iterations и наибольшее число итераций, укладывающееся в бюджет.
+    """
+    password_hasher = get_hasher()
+    salt = password_hasher.salt()
+    counts = options['iterations'] or [
+        password_hasher.iterations // 2,
+        password_hasher.iterations,
+        password_hasher.iterations * 2,
+    ]
+    stdout.write(f'{"итераций":>10}{"мс":>10}')
+    per_iteration = []
+    for iterations in counts:
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            password_hasher.encode('benchmark', salt, iterations)
+            timings.append((time.perf_counter() - started) * 1000)
+        elapsed = median(timings)
+        per_iteration.append(elapsed / iterations)
+        mark = '' if elapsed <= options['budget'] else '  > бюджета'
+        stdout.write(f'{iterations:>10}{elapsed:>10.1f}{mark}')
+    stdout.write(
+        f'Бюджет {options["budget"]:.0f} мс: PASSWORD_HASHER_ITERATIONS = '
+        f'{int(options["budget"] / max(per_iteration)):d}'
+    )
+
+
+def random_word(rng, alphabet, length):
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def profanity(options, stdout):
+    """
+    Проверка комментария на запрещённые слова: прежний цикл и автомат.
+
+    Прежняя проверка ищет каждое из --terms слов в тексте отдельно,
+    автомат Ахо - Корасик проходит нормализованный текст один раз.
+    Печатает среднее время на комментарий из --repeat проверок.
+    """
+    rng = random.Random(0)
+    alphabet = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+    words = [
+        random_word(rng, alphabet, rng.randint(5, 10))
+        for _ in range(options['terms'])
+    ]
+    comments = [
+        ' '.join(
+            random_word(rng, alphabet, rng.randint(2, 9))
+            for _ in range(rng.randint(5, 60))
+        )
+        for _ in range(options['repeat'])
+    ]
+
+    def legacy(text):
+        lowered_text = text.lower()
+        return any(word in lowered_text for word in words)
+
+    started = time.perf_counter()
+    matcher = BadWordMatcher(words)
+    build = time.perf_counter() - started
+    stdout.write(f'{"проверка":<12}{"мкс на комментарий":>20}')
+    for name, check in (('цикл', legacy), ('автомат', matcher.search)):
+        started = time.perf_counter()
+        for text in comments:
+            check(text)
+        elapsed = (time.perf_counter() - started) / len(comments)
+        stdout.write(f'{name:<12}{elapsed * 1e6:>20.1f}')
+    stdout.write(
+        f'Построение автомата на {len(words)} слов: {build * 1000:.0f} мс'
+    )
+
+
+SUITES = {
+    'hasher': hasher,
+    'memory': memory,
+    'profanity': profanity,
+}
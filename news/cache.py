@@ -0,0 +1,155 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment, News
+
+NEWS_FIELDS = (
+    'title', 'text', 'date', 'views', 'archived_comments',
+    'comments_archive_id',
+)
+
+
+def row_size(row):
+    """Приблизительный размер строки кеша в байтах."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+
+class NewsCache:
+    """
+    LRU-кеш строк News в памяти процесса.
+
+    Объём ограничен NEWS_CACHE_MAX_BYTES байт, запись живёт не дольше
+    NEWS_CACHE_TTL секунд. При переполнении вытесняются давно
+    не запрашивавшиеся новости. Записи сбрасываются сигналами
+    post_save и post_delete модели News (см. news.signals).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, pk):
+        with self.lock:
+            entry = self.entries.get(pk)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, row = entry
+            if expires < time.monotonic():
+                self._remove(pk)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(pk)
+            self.hits += 1
+            return row
+
+    def set(self, pk, row):
+        size = row_size(row)
+        if size > settings.NEWS_CACHE_MAX_BYTES:
+            return
+        with self.lock:
+            self._remove(pk)
+            self.entries[pk] = (
+                time.monotonic() + settings.NEWS_CACHE_TTL, size, row
+            )
+            self.size += size
+            while self.size > settings.NEWS_CACHE_MAX_BYTES:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, pk):
+        with self.lock:
+            self._remove(pk)
+
+    def clear(self):
+        """Очищает кеш вместе со статистикой обращений."""
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _remove(self, pk):
+        entry = self.entries.pop(pk, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': settings.NEWS_CACHE_MAX_BYTES,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+news_cache = NewsCache()
+
+
+def get_news(pk):
+    """Новость из кеша процесса, при промахе - из базы; None, если её нет."""
+    row = news_cache.get(pk)
+    if row is None:
+        row = News.objects.filter(pk=pk).values_list(*NEWS_FIELDS).first()
+        if row is None:
+            return None
+        news_cache.set(pk, row)
+    return News.from_db('default', ('id', *NEWS_FIELDS), (pk, *row))
+
+
+def comments_generation_key(news_id):
+    return f'news:comments:{news_id}:generation'
+
+
+def comments_key(news_id, start, stop):
+    """Ключ общего кеша комментариев новости в текущем поколении."""
+    generation = cache.get_or_set(
+        comments_generation_key(news_id), time.time_ns, None
+    )
+    return f'news:comments:{news_id}:{generation}:{start}:{stop}'
+
+
+def page_key(news_id, start, stop):
+    """Ключ общей страницы новости (news.holes) в текущем поколении."""
+    generation = cache.get_or_set(
+        comments_generation_key(news_id), time.time_ns, None
+    )
+    return f'news:page:{news_id}:{generation}:{start}:{stop}'
+
+
+def invalidate_comments(news_id):
+    """Начинает новое поколение кешей комментариев и страницы новости."""
+    cache.set(comments_generation_key(news_id), time.time_ns(), None)
+
+
+def user_comments_count_key(user_id):
+    return f'news:my_comments:{user_id}:count'
+
+
+def user_comments_count(user_id):
+    """Число комментариев пользователя, кешируемое до их изменения."""
+    from .tiers import cold_comments_count
+
+    return cache.get_or_set(
+        user_comments_count_key(user_id),
+        lambda: (
+            Comment.objects.filter(author_id=user_id).count()
+            + cold_comments_count(user_id)
+        ),
+        settings.MY_COMMENTS_COUNT_TIMEOUT,
+    )
+
+
+def invalidate_comments_count(user_id):
+    cache.delete(user_comments_count_key(user_id))
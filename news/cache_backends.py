@@ -0,0 +1,28 @@
+import os
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import (
+    FileBasedCache as BaseFileBasedCache
+)
+from django.core.files import locks
+
+
+class FileBasedCache(BaseFileBasedCache):
+    """
+    Файловый кеш с атомарным add().
+
+    Стандартный add() сначала проверяет наличие файла, а потом пишет его,
+    так что два процесса могут одновременно «захватить» один ключ.
+    Здесь add() выполняется под файловой блокировкой каталога кеша,
+    и на нём можно строить межпроцессные блокировки (news.stampede).
+    """
+    lock_name = 'add.lock'
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                return super().add(key, value, timeout, version)
+            finally:
+                locks.unlock(lock)
@@ -0,0 +1,120 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Буфер счётчиков просмотров новостей с отложенной записью.
+
+    Просмотр только увеличивает счётчик в памяти процесса. Накопленные
+    приращения записываются в базу одной транзакцией фоновым потоком
+    раз в NEWS_VIEWS_FLUSH_INTERVAL секунд или раньше, когда в буфере
+    набралось NEWS_VIEWS_FLUSH_THRESHOLD просмотров, а также при
+    завершении процесса. Если NEWS_VIEWS_FLUSH_INTERVAL = None, поток
+    не запускается и буфер сбрасывается только вызовом flush().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.total = 0
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def increment(self, news_id):
+        with self.lock:
+            self.pending[news_id] += 1
+            self.total += 1
+            total = self.total
+        self.start()
+        if total >= settings.NEWS_VIEWS_FLUSH_THRESHOLD:
+            self.wakeup.set()
+
+    def pending_for(self, news_id):
+        """Ещё не записанные в базу просмотры новости."""
+        with self.lock:
+            return self.pending[news_id]
+
+    def pending_total(self):
+        return self.total
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.total = 0
+
+    def flush(self):
+        """Записывает накопленные просмотры; возвращает число новостей."""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            total, self.total = self.total, 0
+        if not pending:
+            return 0
+        try:
+            self.persist(pending)
+        except DatabaseError as error:
+            logger.warning(
+                'Не удалось записать просмотры %d новостей: %s',
+                len(pending), error,
+            )
+            with self.lock:
+                self.pending.update(pending)
+                self.total += total
+            return 0
+        return len(pending)
+
+    def persist(self, pending):
+        from .cache import news_cache
+        from .models import News
+
+        with transaction.atomic():
+            for news_id, count in pending.items():
+                News.objects.filter(pk=news_id).update(
+                    views=F('views') + count
+                )
+        for news_id in pending:
+            news_cache.invalidate(news_id)
+
+    def start(self):
+        """Запускает фоновый поток записи, если он ещё не запущен."""
+        if self.thread is not None or not settings.NEWS_VIEWS_FLUSH_INTERVAL:
+            return
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.stopping.clear()
+            self.thread = threading.Thread(
+                target=self.run, name='view-counter', daemon=True
+            )
+            self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Останавливает фоновый поток, записав всё накопленное."""
+        thread = self.thread
+        if thread is None:
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        thread.join()
+        self.thread = None
+        atexit.unregister(self.stop)
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(settings.NEWS_VIEWS_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            self.flush()
+            connection.close()
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,286 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+
+Распределения приближены к реальным:
+- число комментариев к новости подчиняется закону Ципфа: у новости
+  ранга r вес 1 / r ** s, так что немногие новости собирают основную
+  часть обсуждения;
+- новости публикуются всплесками вокруг случайных «горячих» дней;
+- комментарии приходят в основном в первые часы после публикации,
+  с длинным хвостом на дни вперёд; часть из них - ответы на более ранние;
+- тексты собираются из русских слов, длина предложений и комментариев
+  распределена логнормально.
+
+Пользователи и новости вставляются bulk_create, комментарии - одним
+подготовленным INSERT через executemany: на миллионе строк сборка SQL
+в bulk_create обходится дороже самой вставки. Id назначаются заранее,
+проверки внешних ключей отключены, SQLite пишет без fsync.
+Одинаковые --seed и --end дают одинаковые данные.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import feeds
+from .models import PATH_STEP, Comment, News, render_text
+
+User = get_user_model()
+
+WORDS = (
+    'город власти жители новость сегодня вчера завтра области района '
+    'президент правительство министр депутаты закон решение проект '
+    'школа больница дорога транспорт метро погода снег дождь жара '
+    'цены рубль экономика рынок компания бизнес работа зарплата налоги '
+    'спорт матч команда победа счёт сезон тренер игрок болельщики '
+    'культура театр фильм выставка концерт музей книга автор премия '
+    'наука учёные исследование открытие космос спутник запуск ракета '
+    'полиция суд дело проверка авария пожар спасатели очевидцы '
+    'очень совсем снова опять уже ещё только почти никогда всегда '
+    'хорошо плохо странно интересно понятно удивительно конечно '
+    'думаю считаю кажется согласен против надеюсь жаль правда '
+    'большой новый старый главный местный важный простой хороший '
+    'люди время год день жизнь страна мир вопрос случай место '
+    'сказал заявил отметил сообщил решили начали закончили открыли '
+    'и в на с по для из от к у о за под при после перед без '
+    'это что как так где когда почему зачем если чтобы но или'
+).split()
+FIRST_NAMES = (
+    'Александр Мария Дмитрий Анна Сергей Елена Андрей Ольга Михаил Наталья '
+    'Иван Татьяна Алексей Ирина Николай Светлана Павел Юлия Максим Екатерина'
+).split()
+LAST_NAMES = (
+    'Иванов Смирнов Кузнецов Попов Васильев Петров Соколов Михайлов '
+    'Новиков Фёдоров Морозов Волков Алексеев Лебедев Семёнов Егоров'
+).split()
+TITLE_LENGTH = News._meta.get_field('title').max_length
+# Порядок значений в строках комментариев для insert_rows().
+COMMENT_COLUMNS = tuple(
+    field.attname for field in Comment._meta.concrete_fields
+)
+# Комментарии собираются из заранее сгенерированных предложений.
+SENTENCE_POOL = 20000
+REPLY_SHARE = 0.3
+HOT_DAYS_SHARE = 0.1
+
+
+@contextmanager
+def fast_inserts():
+    """Отключает проверки внешних ключей и, в SQLite, синхронную запись."""
+    sqlite = connection.vendor == 'sqlite' and not connection.in_atomic_block
+    if sqlite:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        with connection.constraint_checks_disabled():
+            yield
+    finally:
+        if sqlite:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = FULL')
+
+
+def insert_rows(model, rows):
+    """Вставляет кортежи значений всех колонок модели одним executemany."""
+    quote = connection.ops.quote_name
+    fields = model._meta.concrete_fields
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def zipf_counts(rng, total, size, exponent):
+    """Раскладывает total по size корзинам с весами 1 / r ** exponent."""
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in rng.choices(range(size), weights, k=total - sum(counts)):
+        counts[index] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+class DataGenerator:
+
+    def __init__(self, seed, end, days, zipf_exponent, batch_size):
+        self.rng = random.Random(seed)
+        self.end = end
+        self.days = days
+        self.zipf_exponent = zipf_exponent
+        self.batch_size = batch_size
+        self.published = []
+        self.sentences = None
+
+    def sentence(self, mean_words):
+        words = self.rng.choices(
+            WORDS, k=max(1, int(self.rng.lognormvariate(0, 0.5) * mean_words))
+        )
+        return ' '.join(words).capitalize() + self.rng.choice('...!?')
+
+    def paragraph(self, mean_sentences, mean_words=10):
+        count = max(1, int(self.rng.lognormvariate(0, 0.6) * mean_sentences))
+        return ' '.join(self.sentence(mean_words) for _ in range(count))
+
+    def comment_text(self):
+        if self.sentences is None:
+            self.sentences = [self.sentence(8) for _ in range(SENTENCE_POOL)]
+        lines = 1 if self.rng.random() < 0.85 else self.rng.randint(2, 4)
+        return '\n'.join(
+            ' '.join(self.rng.choices(
+                self.sentences, k=1 + int(self.rng.expovariate(1))
+            ))
+            for _ in range(lines)
+        )
+
+    def publication_times(self, count):
+        """Время публикации новостей, собранных вокруг горячих дней."""
+        start = self.end - timedelta(days=self.days)
+        hot_days = [
+            self.rng.uniform(0, self.days)
+            for _ in range(max(1, int(self.days * HOT_DAYS_SHARE)))
+        ]
+        times = []
+        for _ in range(count):
+            if self.rng.random() < 0.5:
+                day = self.rng.choice(hot_days) + self.rng.gauss(0, 0.5)
+            else:
+                day = self.rng.uniform(0, self.days)
+            times.append(start + timedelta(days=min(max(day, 0), self.days)))
+        return times
+
+    def comment_delays(self, count):
+        """Задержки комментариев от публикации: в основном первые часы."""
+        delays = []
+        for _ in range(count):
+            if self.rng.random() < 0.8:
+                seconds = self.rng.expovariate(1 / 3600)
+            else:
+                seconds = self.rng.expovariate(1 / (3 * 24 * 3600))
+            delays.append(timedelta(seconds=seconds))
+        return sorted(delays)
+
+    def insert(self, model, objects, stdout=None):
+        """Вставляет объекты модели или кортежи значений пачками."""
+        inserted = 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                inserted += self.flush(model, batch, stdout, inserted)
+        if batch:
+            inserted += self.flush(model, batch, stdout, inserted)
+        return inserted
+
+    def flush(self, model, batch, stdout, inserted):
+        with transaction.atomic():
+            if isinstance(batch[0], model):
+                model.objects.bulk_create(batch)
+            else:
+                insert_rows(model, batch)
+        size = len(batch)
+        if stdout is not None:
+            stdout.write(
+                f'{model._meta.verbose_name_plural}: {inserted + size}'
+            )
+        batch.clear()
+        return size
+
+    def users(self, count):
+        first_id = next_id(User)
+        for pk in range(first_id, first_id + count):
+            name = (
+                f'{self.rng.choice(FIRST_NAMES)} '
+                f'{self.rng.choice(LAST_NAMES)} {pk}'
+            )
+            yield User(pk=pk, username=name, password=UNUSABLE_PASSWORD_PREFIX)
+
+    def news(self, count):
+        """Новости; время их публикации запоминается в self.published."""
+        first_id = next_id(News)
+        self.published = list(zip(
+            range(first_id, first_id + count), self.publication_times(count)
+        ))
+        for pk, published in self.published:
+            yield News(
+                pk=pk,
+                title=self.sentence(5)[:-1][:TITLE_LENGTH],
+                text=self.paragraph(8),
+                date=published.date(),
+            )
+
+    def comments(self, total, authors):
+        """Строки комментариев и ответов к новостям из self.published."""
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        pk = next_id(Comment)
+        counts = zipf_counts(
+            self.rng, total, len(self.published), self.zipf_exponent
+        )
+        max_depth = settings.COMMENT_MAX_DEPTH
+        for (news_id, published), count in zip(self.published, counts):
+            thread = []
+            for delay in self.comment_delays(count):
+                parent_id, path = None, ''
+                if thread and self.rng.random() < REPLY_SHARE:
+                    parent_id, parent_path = self.rng.choice(thread)
+                    if len(parent_path) // PATH_STEP < max_depth:
+                        path = parent_path
+                    else:
+                        parent_id = None
+                path += f'{pk:0{PATH_STEP}d}'
+                thread.append((pk, path))
+                text = self.comment_text()
+                author_id, author_name = self.rng.choice(authors)
+                values = {
+                    'id': pk,
+                    'news_id': news_id,
+                    'author_id': author_id,
+                    'parent_id': parent_id,
+                    'path': path,
+                    'text': text,
+                    'text_html': render_text(text),
+                    'author_name': author_name,
+                    'created': adapt_datetime(published + delay),
+                }
+                yield tuple(values[name] for name in COMMENT_COLUMNS)
+                pk += 1
+
+
+def generate(
+    users, news, comments, seed=0, end=None, days=365, zipf_exponent=1.1,
+    batch_size=5000, stdout=None,
+):
+    """Создаёт пользователей, новости и комментарии; возвращает их число."""
+    generator = DataGenerator(
+        seed, end or timezone.now(), days, zipf_exponent, batch_size
+    )
+    with fast_inserts():
+        first_user = next_id(User)
+        created_users = generator.insert(
+            User, generator.users(users), stdout
+        )
+        created_news = generator.insert(News, generator.news(news), stdout)
+        authors = list(
+            User.objects.filter(pk__gte=first_user)
+            .values_list('pk', User.USERNAME_FIELD)
+        ) or list(User.objects.values_list('pk', User.USERNAME_FIELD))
+        created_comments = 0
+        if authors and generator.published:
+            created_comments = generator.insert(
+                Comment, generator.comments(comments, authors), stdout
+            )
+    feeds.invalidate()
+    return created_users, created_news, created_comments
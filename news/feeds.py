@@ -0,0 +1,150 @@
+"""
+Ленты последних новостей в форматах RSS 2.0, Atom и JSON Feed.
+
+Лента генерируется потоком и кешируется целиком до следующего
+сохранения или удаления новости. ETag строится по дате и id самой
+свежей новости и поколению ленты, которое меняется при каждом
+изменении новостей, так что повторный опрос с If-None-Match
+обходится одним обращением к кешу. ETag и ленты живут в кеше не дольше
+NEWS_FEED_CACHE_TIMEOUT, даже если новости менялись в обход сигналов.
+"""
+import hashlib
+import json
+import time
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+
+from .models import News
+
+ETAG_KEY = 'news:feed:etag'
+GENERATION_KEY = 'news:feed:generation'
+TITLE = 'YaNews'
+DESCRIPTION = 'Последние новости'
+
+
+def invalidate():
+    """Начинает новое поколение ленты; вызывается при изменении новостей."""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+    cache.delete(ETAG_KEY)
+
+
+def feed_etag(request, *args, **kwargs):
+    """
+    Возвращает ETag ленты, обращаясь к базе раз за поколение
+    или за NEWS_FEED_CACHE_TIMEOUT.
+    """
+    etag = cache.get(ETAG_KEY)
+    if etag is None:
+        latest = News.objects.order_by('-date', '-pk').values_list(
+            'date', 'pk'
+        ).first()
+        generation = cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+        etag = '{}-{}-{}'.format(*(latest or ('', '')), generation)
+        cache.set(ETAG_KEY, etag, settings.NEWS_FEED_CACHE_TIMEOUT)
+    return etag
+
+
+def body_key(feed_format, origin, etag):
+    digest = hashlib.md5(f'{origin}:{etag}'.encode()).hexdigest()
+    return f'news:feed:{feed_format}:{digest}'
+
+
+def latest_news():
+    return News.objects.order_by('-date', '-pk').values_list(
+        'pk', 'title', 'text', 'date'
+    )[:settings.NEWS_FEED_SIZE].iterator()
+
+
+def rss(request):
+    home = request.build_absolute_uri(reverse('news:home'))
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel>'
+        f'<title>{TITLE}</title><link>{escape(home)}</link>'
+        f'<description>{DESCRIPTION}</description>'
+        f'<language>{settings.LANGUAGE_CODE}</language>'
+    )
+    for pk, title, text, date in latest_news():
+        link = escape(request.build_absolute_uri(
+            reverse('news:detail', args=(pk,))
+        ))
+        yield (
+            f'<item><title>{escape(title)}</title><link>{link}</link>'
+            f'<guid>{link}</guid><pubDate>{rfc2822_date(date)}</pubDate>'
+            f'<description>{escape(text)}</description></item>'
+        )
+    yield '</channel></rss>'
+
+
+def atom(request):
+    home = request.build_absolute_uri(reverse('news:home'))
+    self_url = request.build_absolute_uri(reverse('news:atom'))
+    latest = News.objects.order_by('-date').values_list(
+        'date', flat=True
+    ).first()
+    updated = rfc3339_date(latest) if latest else ''
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<feed xmlns="http://www.w3.org/2005/Atom" '
+        f'xml:lang="{settings.LANGUAGE_CODE}">'
+        f'<title>{TITLE}</title><subtitle>{DESCRIPTION}</subtitle>'
+        f'<link href="{escape(home)}" rel="alternate"/>'
+        f'<link href="{escape(self_url)}" rel="self"/>'
+        f'<id>{escape(home)}</id><updated>{updated}</updated>'
+    )
+    for pk, title, text, date in latest_news():
+        link = escape(request.build_absolute_uri(
+            reverse('news:detail', args=(pk,))
+        ))
+        yield (
+            f'<entry><title>{escape(title)}</title>'
+            f'<link href="{link}" rel="alternate"/><id>{link}</id>'
+            f'<updated>{rfc3339_date(date)}</updated>'
+            f'<summary type="text">{escape(text)}</summary></entry>'
+        )
+    yield '</feed>'
+
+
+def json_feed(request):
+    header = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': TITLE,
+        'description': DESCRIPTION,
+        'home_page_url': request.build_absolute_uri(reverse('news:home')),
+        'feed_url': request.build_absolute_uri(reverse('news:json')),
+        'language': settings.LANGUAGE_CODE,
+    }, ensure_ascii=False)
+    yield header[:-1] + ', "items": ['
+    separator = ''
+    for pk, title, text, date in latest_news():
+        url = request.build_absolute_uri(reverse('news:detail', args=(pk,)))
+        yield separator + json.dumps({
+            'id': url,
+            'url': url,
+            'title': title,
+            'content_text': text,
+            'date_published': rfc3339_date(date),
+        }, ensure_ascii=False)
+        separator = ', '
+    yield ']}'
+
+
+FORMATS = {
+    'rss': (rss, 'application/rss+xml; charset=utf-8'),
+    'atom': (atom, 'application/atom+xml; charset=utf-8'),
+    'json': (json_feed, 'application/feed+json; charset=utf-8'),
+}
+
+
+def stream_and_store(chunks, key):
+    """Отдаёт части ленты и кладёт собранную ленту в кеш."""
+    parts = []
+    for chunk in chunks:
+        data = chunk.encode()
+        parts.append(data)
+        yield data
+    cache.set(key, b''.join(parts), settings.NEWS_FEED_CACHE_TIMEOUT)
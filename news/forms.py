@@ -1,14 +1,17 @@
-from django.forms import ModelForm
+from django.forms import HiddenInput, ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import BadWordMatcher
 
 BAD_WORDS = (
     'редиска',
     'негодяй',
     # Дополните список на своё усмотрение.
 )
+BAD_WORDS_MATCHER = BadWordMatcher(BAD_WORDS)
 WARNING = 'Не ругайтесь!'
+TOO_DEEP = 'Слишком глубокая ветка обсуждения.'
 
 
 class CommentForm(ModelForm):
@@ -18,10 +21,27 @@ class CommentForm(ModelForm):
         fields = ('text',)
 
     def clean_text(self):
-        """Не позволяем ругаться в комментариях."""
+        """Не позволяем ругаться в комментариях, даже замаскированно."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if BAD_WORDS_MATCHER.search(text):
+            raise ValidationError(WARNING)
         return text
+
+
+class NewCommentForm(CommentForm):
+    """Новый комментарий или ответ на комментарий к той же новости."""
+
+    class Meta(CommentForm.Meta):
+        fields = ('text', 'parent')
+        widgets = {'parent': HiddenInput}
+
+    def __init__(self, *args, news, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['parent'].queryset = news.comment_set.all()
+
+    def clean_parent(self):
+        """Не даём отвечать глубже COMMENT_MAX_DEPTH уровней."""
+        parent = self.cleaned_data['parent']
+        if parent is not None and not parent.can_have_replies:
+            raise ValidationError(TOO_DEEP)
+        return parent
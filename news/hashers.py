@@ -0,0 +1,84 @@
+"""
+Хешер паролей PBKDF2 с настраиваемой стоимостью.
+
+Число итераций задаётся PASSWORD_HASHER_ITERATIONS, поэтому его можно
+подобрать под бюджет задержки (python manage.py benchmark hasher) без
+правки кода. Пароли, захешированные с другой стоимостью, Django
+перехеширует при следующем успешном входе: must_update() сравнивает
+сохранённое число итераций с текущей настройкой.
+
+Если PASSWORD_HASHING_PROCESSES больше нуля, сами вычисления PBKDF2
+выполняются в отдельном пуле из стольких процессов. Так всплеск
+регистраций занимает не больше этого числа ядер и не отнимает процессор
+у воркеров, отдающих новости.
+"""
+import atexit
+import base64
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.crypto import pbkdf2
+
+
+def derive(password, salt, iterations, digest_name):
+    """Вычисляет хеш PBKDF2 в base64; выполняется и в процессах пула."""
+    digest = getattr(hashlib, digest_name)
+    hash = pbkdf2(password, salt, iterations, digest=digest)
+    return base64.b64encode(hash).decode('ascii').strip()
+
+
+class HashingPool:
+    """
+    Пул процессов для хеширования паролей, создаваемый по требованию.
+
+    После fork (например, в воркерах gunicorn с --preload) пул родителя
+    непригоден, поэтому он пересоздаётся в каждом процессе.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+
+    def submit(self, *args):
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                self.executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_PROCESSES
+                )
+                self.pid = os.getpid()
+                atexit.register(self.executor.shutdown)
+            executor = self.executor
+        return executor.submit(*args)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None and self.pid == os.getpid():
+            executor.shutdown()
+
+
+hashing_pool = HashingPool()
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 с числом итераций из настроек и пулом процессов."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHER_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+        args = (password, salt, iterations, self.digest().name)
+        if settings.PASSWORD_HASHING_PROCESSES:
+            hash = hashing_pool.submit(derive, *args).result()
+        else:
+            hash = derive(*args)
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
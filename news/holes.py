@@ -0,0 +1,64 @@
+"""
+Общая для всех пользователей страница с «дырами» под личные фрагменты.
+
+Страница рендерится без запроса и пользователя, с punch_holes = True:
+вместо шапки, счётчика просмотров, формы комментария (с CSRF-токеном)
+и ссылок «Ответить», «Редактировать», «Удалить» в ней остаются
+HTML-комментарии <!--hole:имя:аргументы-->. Такую страницу можно
+кешировать одну на всех, а личные фрагменты подставляются вторым
+проходом одним регулярным выражением.
+"""
+import re
+from types import SimpleNamespace
+
+from django.template.loader import get_template
+
+HOLE = re.compile(r'<!--hole:(\w+)((?::\d+)*)-->')
+# Ссылки под комментарием рендерятся по разу на вариант с этим id,
+# а затем он заменяется настоящим.
+PLACEHOLDER_PK = 2 ** 62
+
+
+class CommentActions:
+    """Ссылки под комментариями для одного пользователя."""
+    template_name = 'includes/comment_actions.html'
+
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+        self.variants = {}
+
+    def render(self, pk, author_id, can_have_replies):
+        if not self.user.is_authenticated:
+            return ''
+        own = author_id == self.user.pk
+        key = (own, can_have_replies)
+        if key not in self.variants:
+            comment = SimpleNamespace(
+                pk=PLACEHOLDER_PK,
+                author_id=self.user.pk if own else None,
+                can_have_replies=can_have_replies,
+            )
+            self.variants[key] = get_template(self.template_name).render(
+                {'comment': comment}, self.request
+            )
+        return self.variants[key].replace(str(PLACEHOLDER_PK), str(pk))
+
+
+def fill(page, request, fragments):
+    """
+    Подставляет в общую страницу фрагменты для текущего запроса.
+
+    fragments - словарь {имя дыры: HTML}; ссылки под комментариями
+    рендерятся CommentActions.
+    """
+    actions = CommentActions(request)
+
+    def replace(match):
+        name, args = match.groups()
+        if name == 'actions':
+            pk, author_id, can_have_replies = map(int, args[1:].split(':'))
+            return actions.render(pk, author_id, bool(can_have_replies))
+        return fragments[name]
+
+    return HOLE.sub(replace, page)
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from news import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Запускает бенчмарки проекта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(benchmarks.SUITES))
+        parser.add_argument(
+            '--comments', type=int, default=500,
+            help='Количество комментариев к каждой новости.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество замеряемых запросов.',
+        )
+        parser.add_argument(
+            '--iterations', type=int, nargs='+',
+            help='Числа итераций PBKDF2 для бенчмарка hasher.',
+        )
+        parser.add_argument(
+            '--budget', type=float, default=100,
+            help='Бюджет задержки хеширования пароля, мс.',
+        )
+        parser.add_argument(
+            '--terms', type=int, default=10000,
+            help='Размер списка запрещённых слов для бенчмарка profanity.',
+        )
+        parser.add_argument(
+            '--variant', choices=sorted(benchmarks.MEMORY_VARIANTS),
+            help='Служебный: замерить один вариант в текущем процессе.',
+        )
+
+    def handle(self, *args, **options):
+        if options['variant']:
+            result = benchmarks.memory_variant(options['variant'], options)
+            self.stdout.write(json.dumps(result))
+            return
+        benchmarks.SUITES[options['suite']](options, self.stdout)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит статическую карту сайта: индекс и шарды по '
+        'SITEMAP_SHARD_SIZE адресов. Переписывает только изменившиеся шарды.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--root', default=settings.SITEMAP_ROOT,
+            help='Каталог для файлов карты сайта.',
+        )
+        parser.add_argument(
+            '--base-url', default=settings.SITEMAP_BASE_URL,
+            help='Адрес сайта для ссылок на новости.',
+        )
+        parser.add_argument(
+            '--shard-size', type=int, default=settings.SITEMAP_SHARD_SIZE,
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать шарды gzip.',
+        )
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        result = sitemaps.build(
+            root=options['root'],
+            base_url=base_url,
+            files_url=base_url + settings.SITEMAP_URL,
+            shard_size=options['shard_size'],
+            compress=options['gzip'],
+        )
+        self.stdout.write(
+            f'Записано шардов: {len(result["written"])}, '
+            f'без изменений: {len(result["skipped"])}, '
+            f'удалено: {len(result["removed"])}.'
+        )
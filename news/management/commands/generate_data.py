@@ -0,0 +1,64 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from news.datagen import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями и '
+        'комментариями с реалистичными распределениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно - одинаковые данные.',
+        )
+        parser.add_argument(
+            '--end', type=datetime.fromisoformat,
+            help='Дата последней новости, ГГГГ-ММ-ДД; по умолчанию сегодня.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --end публикуются новости.',
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель закона Ципфа для комментариев к новостям.',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['news'] <= 0 and options['comments'] > 0:
+            raise CommandError('Для комментариев нужны новости (--news).')
+        end = options['end'] or timezone.localtime().replace(
+            hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+        )
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        started = time.monotonic()
+        users, news, comments = generate(
+            options['users'],
+            options['news'],
+            options['comments'],
+            seed=options['seed'],
+            end=end,
+            days=options['days'],
+            zipf_exponent=options['zipf'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.monotonic() - started
+        total = users + news + comments
+        self.stdout.write(
+            f'Создано пользователей: {users}, новостей: {news}, '
+            f'комментариев: {comments} за {elapsed:.1f} с '
+            f'({total / elapsed * 60 if elapsed else 0:,.0f} строк в минуту).'
+        )
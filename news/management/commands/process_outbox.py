@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from news.notifications import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Рассылает уведомления о новых комментариях из outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько уведомлений отправлять одновременно.',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После стольких неудач уведомление больше не отправляется.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Пауза в секундах, когда outbox пуст.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать готовые уведомления и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_batch(
+                options['batch_size'],
+                options['concurrency'],
+                options['max_attempts'],
+            )
+            total += processed
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+        self.stdout.write(f'Обработано уведомлений: {total}.')
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.startup import import_time_by_app, profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Профилирует холодный старт: время импорта и готовности '
+        'каждого приложения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lean', action='store_true',
+            help='Замерить облегчённый профиль (YANEWS_LEAN_STARTUP=1).',
+        )
+        parser.add_argument(
+            '--modules', type=int, default=10,
+            help='Сколько самых медленных модулей показать.',
+        )
+
+    def handle(self, *args, **options):
+        report = profile(lean=options['lean'])
+        imports = import_time_by_app(report)
+        self.stdout.write(
+            f'{"приложение":<32}{"импорт":>9}{"create":>9}'
+            f'{"models":>9}{"ready":>9}  (мс)'
+        )
+        for app, timings in report['apps'].items():
+            self.stdout.write(
+                f'{app:<32}{imports[app] * 1000:>9.1f}'
+                + ''.join(
+                    f'{timings.get(step, 0) * 1000:>9.1f}'
+                    for step in ('create', 'models', 'ready')
+                )
+            )
+        slowest = sorted(
+            report['imports'].items(), key=lambda item: item[1], reverse=True
+        )
+        self.stdout.write('\nСамые медленные модули (собственное время):')
+        for module, seconds in slowest[:options['modules']]:
+            self.stdout.write(f'{seconds * 1000:>9.1f} мс  {module}')
+        self.stdout.write(
+            f'\ndjango.setup(): {report["setup"] * 1000:.1f} мс, '
+            f'первое разрешение URL: {report["urls"] * 1000:.1f} мс, '
+            f'первый reverse(): {report["reverse"] * 1000:.1f} мс'
+        )
+        if report['setup'] > settings.STARTUP_TIME_BUDGET:
+            self.stderr.write(
+                f'Старт дольше бюджета {settings.STARTUP_TIME_BUDGET} с.'
+            )
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.archive import purge_news
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет новости с комментариями короткими транзакциями, '
+        'предварительно сохраняя их в сжатый архив.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('news_ids', nargs='+', type=int)
+        parser.add_argument(
+            '--archive-dir', default=settings.NEWS_ARCHIVE_ROOT,
+            help='Каталог для архивов news-<id>-<время>.jsonl.gz.',
+        )
+        parser.add_argument(
+            '--no-archive', action='store_true',
+            help='Удалить без архива.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NEWS_PURGE_BATCH_SIZE,
+            help='Начальный размер пачки комментариев.',
+        )
+        parser.add_argument(
+            '--lock-budget', type=float,
+            default=settings.NEWS_PURGE_LOCK_BUDGET,
+            help='Сколько секунд может длиться одна транзакция удаления.',
+        )
+
+    def handle(self, *args, **options):
+        archive_root = None if options['no_archive'] else options[
+            'archive_dir'
+        ]
+        for news_id in options['news_ids']:
+            deleted, path = purge_news(
+                news_id,
+                archive_root,
+                options['batch_size'],
+                options['lock_budget'],
+            )
+            message = f'Новость {news_id}: удалено комментариев: {deleted}'
+            if path is not None:
+                message += f', архив {path}'
+            self.stdout.write(message + '.')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from news.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет готовый HTML (text_html) у комментариев, '
+        'созданных до его появления или в обход save().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = Comment.objects.fill_text_html(options['batch_size'])
+        self.stdout.write(f'Обновлено комментариев: {updated}.')
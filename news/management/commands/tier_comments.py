@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from news.tiers import archive_old_comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые комментарии в холодные таблицы по месяцам, '
+        'чтобы горячая таблица и её индексы не росли бесконечно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.COMMENTS_HOT_DAYS,
+            help='Переносить комментарии старше стольких дней.',
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_old_comments(
+            timezone.now() - timedelta(days=options['days'])
+        )
+        self.stdout.write(f'Перенесено комментариев: {moved}.')
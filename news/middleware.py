@@ -0,0 +1,227 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from .querybudget import QueryBudgetExceeded, QueryRecorder
+from .routers import use_replicas
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Возвращает словарь {кодировка: вес} из заголовка Accept-Encoding."""
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        encodings[name] = weight
+    return encodings
+
+
+def brotli_compress_sequence(sequence):
+    """Потоково сжимает последовательность байтовых строк алгоритмом br."""
+    compressor = brotli.Compressor()
+    for item in sequence:
+        data = compressor.process(item)
+        data += compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов с выбором алгоритма по заголовку Accept-Encoding.
+
+    Поддерживает brotli (если установлен пакет brotli) и gzip, не трогает
+    ответы короче COMPRESSION_MIN_LENGTH и сжимает потоковые ответы
+    на лету, не собирая их целиком в памяти.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encodings = ('br', 'gzip') if brotli else ('gzip',)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def choose_encoding(self, request):
+        accepted = parse_accept_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        candidates = [
+            (accepted.get(name, accepted.get('*', 0.0)), name)
+            for name in self.encodings
+        ]
+        weight, encoding = max(
+            candidates, key=lambda candidate: candidate[0]
+        )
+        return encoding if weight > 0 else None
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            if encoding == 'br':
+                compressed = brotli_compress_sequence(
+                    response.streaming_content
+                )
+            else:
+                compressed = compress_sequence(response.streaming_content)
+            response.streaming_content = compressed
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(response.content)
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Включает чтение с реплик для GET- и HEAD-запросов.
+
+    После успешного изменяющего запроса (например, отправки комментария)
+    пользователь получает cookie REPLICA_STICKY_COOKIE на
+    REPLICA_STICKY_SECONDS секунд. Пока она жива, все его запросы читают
+    из основной базы и видят собственные изменения. Потоковые ответы
+    читают с реплик до конца отдачи.
+    """
+
+    safe_methods = ('GET', 'HEAD')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        sticky = settings.REPLICA_STICKY_COOKIE in request.COOKIES
+        if request.method in self.safe_methods and not sticky:
+            with use_replicas():
+                response = self.get_response(request)
+            if response.streaming:
+                response.streaming_content = self.stream_from_replicas(
+                    response.streaming_content
+                )
+            return response
+        response = self.get_response(request)
+        if (
+            request.method not in self.safe_methods
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def stream_from_replicas(self, content):
+        # Генератор выполняется уже после выхода из __call__, возможно
+        # в другом контексте, поэтому реплики включаются внутри него.
+        with use_replicas():
+            yield from content
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет, что view уложилось в свой бюджет SQL-запросов.
+
+    Бюджет берётся из атрибута query_budget view (декоратор
+    news.querybudget.query_budget) или из QUERY_BUDGETS по имени URL.
+    Для потоковых ответов запросы считаются до конца отдачи.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            stack.close()
+            raise
+        if response.streaming:
+            response.streaming_content = self.check_after_stream(
+                request, response.streaming_content, recorder, stack
+            )
+            return response
+        stack.close()
+        self.check(request, recorder)
+        return response
+
+    def check_after_stream(self, request, content, recorder, stack):
+        with stack:
+            yield from content
+        self.check(request, recorder)
+
+    def get_budget(self, request):
+        match = request.resolver_match
+        if match is None:
+            return None
+        budget = getattr(match.func, 'query_budget', None)
+        if budget is None:
+            budget = settings.QUERY_BUDGETS.get(match.view_name)
+        return budget
+
+    def check(self, request, recorder):
+        budget = self.get_budget(request)
+        if budget is None or recorder.count <= budget:
+            return
+        view_name = request.resolver_match.view_name
+        duplicates = '\n'.join(
+            f'{count} x {sql}' for sql, count in recorder.duplicates()
+        )
+        message = (
+            f'{request.method} {view_name}: {recorder.count} SQL-запросов '
+            f'при бюджете {budget}.'
+        )
+        if duplicates:
+            message += f' Повторяются:\n{duplicates}'
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.15 on 2026-10-19 14:26
+
+import datetime
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models.functions import Cast, LPad
+
+
+def fill_paths(apps, schema_editor):
+    """Существующие комментарии становятся комментариями верхнего уровня."""
+    Comment = apps.get_model('news', 'Comment')
+    Comment.objects.update(
+        path=LPad(Cast('pk', models.CharField()), 10, models.Value('0'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='news.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=160),
+        ),
+        migrations.AlterField(
+            model_name='news',
+            name='date',
+            field=models.DateField(default=datetime.datetime.today),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['news', 'path'], name='news_commen_news_id_2560f4_idx'),
+        ),
+    ]
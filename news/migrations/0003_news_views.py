@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-19 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-19 14:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_news_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('email_sent', models.BooleanField(default=False)),
+                ('webhook_sent', models.BooleanField(default=False)),
+                ('sent', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='news.comment')),
+            ],
+            options={
+                'ordering': ('next_attempt',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sent', 'next_attempt'], name='news_notifi_sent_a19441_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_notification'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', 'created'], name='news_commen_author__d7e884_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.15 on 2026-10-19 15:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_comment_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('table', models.CharField(editable=False, max_length=63, unique=True)),
+                ('comments', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            options={
+                'verbose_name': 'Архив комментариев',
+                'verbose_name_plural': 'Архивы комментариев',
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='archived_comments',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='comments_archive',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, to='news.commentarchive'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.15 on 2026-10-19 15:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_author_names(apps, schema_editor):
+    """Имена авторов в горячей и холодных таблицах комментариев."""
+    Comment = apps.get_model('news', 'Comment')
+    CommentArchive = apps.get_model('news', 'CommentArchive')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Comment.objects.update(author_name=Subquery(
+        User.objects.filter(pk=OuterRef('author_id')).values('username')[:1]
+    ))
+    quote = schema_editor.quote_name
+    for table in CommentArchive.objects.values_list('table', flat=True):
+        schema_editor.execute(
+            'ALTER TABLE {} ADD COLUMN author_name varchar(150) '
+            "DEFAULT '' NOT NULL".format(quote(table))
+        )
+        schema_editor.execute(
+            "UPDATE {0} SET author_name = COALESCE((SELECT username FROM {1} "
+            "WHERE {1}.id = {0}.author_id), '')".format(
+                quote(table), quote(User._meta.db_table)
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0007_comment_tiers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='author_name',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_author_names, migrations.RunPython.noop),
+    ]
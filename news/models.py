@@ -1,13 +1,57 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Cast, LPad
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+
+# Путь комментария в дереве - номера предков и его собственный номер,
+# каждый дополнен нулями до PATH_STEP символов. Сортировка по пути
+# выдаёт всё дерево обсуждения в порядке обхода одним запросом.
+PATH_STEP = 10
+MAX_PATH_DEPTH = 16
+
+
+class CommentArchive(models.Model):
+    """
+    Холодная таблица комментариев к новостям одного месяца (news.tiers).
+
+    Таблица создаётся при первом переносе в неё комментариев; её имя
+    не меняется, comments - число лежащих в ней комментариев.
+    """
+    month = models.DateField(unique=True)
+    table = models.CharField(max_length=63, unique=True, editable=False)
+    comments = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        ordering = ('-month',)
+        verbose_name = 'Архив комментариев'
+        verbose_name_plural = 'Архивы комментариев'
+
+    def __str__(self):
+        return self.table
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    views = models.PositiveIntegerField(default=0, editable=False)
+    # Первые archived_comments комментариев в порядке обхода дерева
+    # перенесены в холодную таблицу comments_archive (см. news.tiers).
+    archived_comments = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    comments_archive = models.ForeignKey(
+        CommentArchive,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-date',)
@@ -18,6 +62,61 @@ class News(models.Model):
         return self.title
 
 
+def render_text(text):
+    """HTML текста комментария: экранированный, с <br> вместо переводов."""
+    return linebreaksbr(text, autoescape=True)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def thread(self, news_id):
+        """Все комментарии к новости в порядке обхода дерева."""
+        return self.filter(news_id=news_id).order_by('path')
+
+    def fill_root_paths(self):
+        """
+        Проставляет пути комментариям, созданным в обход save().
+
+        bulk_create не вызывает save(), поэтому такие комментарии
+        остаются без пути; считаем их комментариями верхнего уровня.
+        """
+        return self.filter(path='', parent__isnull=True).update(
+            path=LPad(
+                Cast('pk', models.CharField()), PATH_STEP, models.Value('0')
+            )
+        )
+
+    def fill_author_names(self):
+        """Проставляет имена авторов комментариям, созданным в обход save()."""
+        user_model = get_user_model()
+        return self.filter(author_name='').update(author_name=Subquery(
+            user_model.objects.filter(pk=OuterRef('author_id')).values(
+                user_model.USERNAME_FIELD
+            )[:1]
+        ))
+
+    def fill_text_html(self, batch_size=1000):
+        """
+        Рендерит text_html комментариям, созданным в обход save().
+
+        Обходит комментарии по id пачками по batch_size штук;
+        возвращает число обновлённых.
+        """
+        updated = last = 0
+        while True:
+            batch = list(
+                self.filter(text_html='', pk__gt=last)
+                .order_by('pk').only('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                return updated
+            for comment in batch:
+                comment.text_html = render_text(comment.text)
+            self.model.objects.bulk_update(batch, ('text_html',))
+            updated += len(batch)
+            last = batch[-1].pk
+
+
 class Comment(models.Model):
     news = models.ForeignKey(
         News,
@@ -27,11 +126,87 @@ class Comment(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='replies',
+    )
+    path = models.CharField(
+        max_length=PATH_STEP * MAX_PATH_DEPTH,
+        editable=False,
+        default='',
+    )
     text = models.TextField()
+    # Готовый HTML текста, чтобы не применять linebreaksbr при каждом
+    # показе. Заполняется в save(), для старых записей - командой
+    # render_comments.
+    text_html = models.TextField(editable=False, default='')
+    # Имя автора на момент последнего переименования, чтобы страница
+    # новости не читала таблицу пользователей. Заполняется в save(),
+    # при смене имени обновляется сигналом (см. news.signals).
+    author_name = models.CharField(max_length=150, editable=False, default='')
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    # Комментарии из холодного хранилища (news.tiers) только для чтения.
+    archived = False
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(fields=('news', 'path')),
+            models.Index(fields=('author', 'created')),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        self.text_html = render_text(self.text)
+        if not self.author_name:
+            self.author_name = self.author.get_username()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+        if not self.path:
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = f'{prefix}{self.pk:0{PATH_STEP}d}'
+            type(self).objects.filter(pk=self.pk).update(path=self.path)
+
+    @property
+    def depth(self):
+        """Уровень вложенности: 0 у комментариев верхнего уровня."""
+        return max(len(self.path) // PATH_STEP - 1, 0)
+
+    @property
+    def can_have_replies(self):
+        return self.depth + 1 < settings.COMMENT_MAX_DEPTH
+
+
+class Notification(models.Model):
+    """
+    Исходящее уведомление о новом комментарии (outbox).
+
+    Запись создаётся в одной транзакции с комментарием, а рассылкой
+    участникам обсуждения занимается команда process_outbox.
+    """
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    email_sent = models.BooleanField(default=False)
+    webhook_sent = models.BooleanField(default=False)
+    sent = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('next_attempt',)
+        indexes = (models.Index(fields=('sent', 'next_attempt')),)
+
+    def __str__(self):
+        return f'Уведомление о комментарии {self.comment_id}'
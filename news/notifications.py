@@ -0,0 +1,172 @@
+"""
+Рассылка уведомлений о новых комментариях из outbox.
+
+Комментарий и запись Notification сохраняются одной транзакцией, так что
+POST комментария не ждёт рассылки и не теряет её при сбое. Рассылку
+выполняет команда process_outbox: она забирает пачку готовых записей,
+отправляет письма и вебхуки в пуле потоков без обращений к базе
+и планирует повтор с экспоненциальной задержкой при ошибке.
+"""
+import json
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Comment, Notification
+
+User = get_user_model()
+
+
+def enqueue(comment):
+    """Ставит уведомление в outbox; вызывать в транзакции комментария."""
+    return Notification.objects.create(comment=comment)
+
+
+def claim(batch_size, max_attempts):
+    """
+    Забирает пачку готовых к отправке уведомлений.
+
+    Забранные записи откладываются на NOTIFICATIONS_LEASE секунд, чтобы
+    параллельный обработчик не взял их повторно; если обработчик упадёт,
+    записи снова станут доступны по истечении этого срока.
+    """
+    now = timezone.now()
+    ready = Notification.objects.filter(
+        sent__isnull=True, attempts__lt=max_attempts, next_attempt__lte=now
+    )
+    ids = list(ready.values_list('pk', flat=True)[:batch_size])
+    lease = now + timedelta(seconds=settings.NOTIFICATIONS_LEASE)
+    ready.filter(pk__in=ids).update(next_attempt=lease)
+    return list(
+        Notification.objects.filter(pk__in=ids, next_attempt=lease)
+        .select_related('comment__news')
+    )
+
+
+def recipients(notifications):
+    """Участники обсуждения каждой новости одним запросом на пачку."""
+    news_ids = {item.comment.news_id for item in notifications}
+    authors = {}
+    for news_id, author_id in Comment.objects.filter(
+        news_id__in=news_ids
+    ).values_list('news_id', 'author_id').distinct().order_by():
+        authors.setdefault(news_id, set()).add(author_id)
+    users = {
+        user['pk']: user
+        for user in User.objects.filter(
+            pk__in=set().union(*authors.values())
+        ).values('pk', 'username', 'email')
+    }
+    return {
+        item.pk: [
+            users[author_id]
+            for author_id in sorted(authors.get(item.comment.news_id, ()))
+            if author_id != item.comment.author_id
+        ]
+        for item in notifications
+    }
+
+
+def payload(notification, users):
+    comment = notification.comment
+    return {
+        'news': {
+            'id': comment.news_id,
+            'title': comment.news.title,
+            'url': settings.SITE_URL + reverse(
+                'news:detail', args=(comment.news_id,)
+            ),
+        },
+        'comment': {
+            'id': comment.pk,
+            'author': comment.author_name,
+            'text': comment.text,
+        },
+        'recipients': [user['username'] for user in users],
+    }
+
+
+def send_email(data, users):
+    messages = [
+        EmailMessage(
+            subject=f'Новый комментарий к «{data["news"]["title"]}»',
+            body=(
+                f'{data["comment"]["author"]} пишет:\n\n'
+                f'{data["comment"]["text"]}\n\n{data["news"]["url"]}'
+            ),
+            to=[user['email']],
+        )
+        for user in users if user['email']
+    ]
+    if messages:
+        with get_connection() as connection:
+            connection.send_messages(messages)
+
+
+def send_webhook(data):
+    request = urllib.request.Request(
+        settings.NOTIFICATIONS_WEBHOOK_URL,
+        data=json.dumps(data, ensure_ascii=False).encode(),
+        headers={'Content-Type': 'application/json; charset=utf-8'},
+        method='POST',
+    )
+    with urllib.request.urlopen(
+        request, timeout=settings.NOTIFICATIONS_WEBHOOK_TIMEOUT
+    ):
+        pass
+
+
+def deliver(notification, users):
+    """
+    Отправляет уведомление по всем каналам; база здесь не используется.
+
+    Возвращает отправленные каналы и текст ошибки (или None).
+    """
+    data = payload(notification, users)
+    done = {}
+    try:
+        if not notification.email_sent:
+            send_email(data, users)
+            done['email_sent'] = True
+        webhook = settings.NOTIFICATIONS_WEBHOOK_URL
+        if webhook and not notification.webhook_sent:
+            send_webhook(data)
+            done['webhook_sent'] = True
+    except Exception as error:
+        return done, repr(error)
+    return done, None
+
+
+def process_batch(batch_size, concurrency, max_attempts):
+    """Обрабатывает одну пачку outbox; возвращает число уведомлений."""
+    notifications = claim(batch_size, max_attempts)
+    if not notifications:
+        return 0
+    users = recipients(notifications)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = pool.map(
+            lambda item: deliver(item, users[item.pk]), notifications
+        )
+        results = list(results)
+    now = timezone.now()
+    for notification, (done, error) in zip(notifications, results):
+        if error is None:
+            Notification.objects.filter(pk=notification.pk).update(
+                sent=now, error='', **done
+            )
+            continue
+        delay = settings.NOTIFICATIONS_RETRY_DELAY * 2 ** notification.attempts
+        Notification.objects.filter(pk=notification.pk).update(
+            attempts=F('attempts') + 1,
+            next_attempt=now + timedelta(seconds=delay),
+            error=error,
+            **done,
+        )
+    return len(notifications)
@@ -0,0 +1,91 @@
+"""
+Поиск запрещённых слов, устойчивый к простым способам маскировки.
+
+Текст сначала нормализуется: приводится к нижнему регистру, латинские
+и цифровые двойники кириллических букв заменяются самими буквами, знаки
+препинания - пробелами, а невидимые символы удаляются - всё это одним
+вызовом str.translate с заранее построенной таблицей. Пробелы остаются
+границами слов и удаляются только между одиночными буквами
+(«Н Е Г О Д Я Й», «р-е-д-и-с-к-а»). Затем повторы букв схлопываются
+в одну. Слова из списка проходят ту же нормализацию, поэтому
+«р-е-д-и-с-к-а», «pедиcкa» и «рееедиска» совпадают с «редиска»,
+а «редис каждый день» и «редис,капусту» - нет.
+
+Нормализованный текст проверяется автоматом Ахо - Корасик за один проход,
+так что время проверки зависит от длины комментария, а не от размера
+списка.
+"""
+import re
+import string
+from collections import deque
+
+HOMOGLYPHS = {
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'n': 'п', 'o': 'о', 'p': 'р', 'r': 'г', 't': 'т', 'u': 'и', 'x': 'х',
+    'y': 'у', 'ё': 'е', '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а',
+}
+SEPARATORS = (
+    string.punctuation.replace('@', '').replace('_', '')
+    + '«»\u2010\u2011\u2012\u2013\u2014\u2015\u2026'
+)
+# Мягкий перенос, символы нулевой ширины, знак ударения и подчёркивание,
+# которое в обычном тексте слова не разделяет.
+IGNORED = '_\u00ad\u200b\u200c\u200d\u2060\ufeff\u0301'
+TRANSLATION = str.maketrans({
+    **HOMOGLYPHS,
+    **dict.fromkeys(SEPARATORS, ' '),
+    **dict.fromkeys(IGNORED),
+})
+# Пробелы между одиночными буквами, например в «н е г о д я й».
+LETTER_SPACES = re.compile(r'(?<=(?<!\S)\S)\s+(?=\S(?!\S))')
+REPEATS = re.compile(r'(.)\1+')
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором сравниваются слова."""
+    text = LETTER_SPACES.sub('', text.lower().translate(TRANSLATION))
+    return REPEATS.sub(r'\1', text).strip()
+
+
+class BadWordMatcher:
+    """Автомат Ахо - Корасик по нормализованным запрещённым словам."""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for word in {normalize(word) for word in words} - {''}:
+            node = 0
+            for char in word:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.terminal.append(False)
+                node = child
+            self.terminal[node] = True
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                if self.terminal[self.fail[child]]:
+                    self.terminal[child] = True
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно запрещённое слово."""
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        node = 0
+        for char in normalize(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if terminal[node]:
+                return True
+        return False
@@ -0,0 +1,54 @@
+from datetime import date, datetime
+from typing import NamedTuple
+
+from django.db.models import Count, F
+
+from .models import Comment, News
+
+
+class NewsRow(NamedTuple):
+    """Лёгкое представление новости для главной страницы."""
+    pk: int
+    title: str
+    text: str
+    date: date
+    comment_count: int
+
+
+class CommentRow(NamedTuple):
+    """Лёгкое представление комментария для страницы новости."""
+    pk: int
+    text: str
+    text_html: str
+    created: datetime
+    author_id: int
+    author_name: str
+    path: str
+    # Комментарий из холодного хранилища (news.tiers): только для чтения.
+    archived: bool = False
+
+    def __str__(self):
+        return self.text[:50]
+
+    depth = Comment.depth
+
+    @property
+    def can_have_replies(self):
+        return not self.archived and Comment.can_have_replies.fget(self)
+
+
+def home_news(limit):
+    """Последние новости с количеством комментариев одним запросом."""
+    rows = News.objects.annotate(
+        comment_count=Count('comment') + F('archived_comments')
+    ).order_by(*News._meta.ordering).values_list(*NewsRow._fields)[:limit]
+    return [NewsRow._make(row) for row in rows]
+
+
+def news_comments(news_id, start=0, stop=None):
+    """Дерево комментариев к новости одним запросом, без таблицы авторов."""
+    rows = Comment.objects.thread(news_id).values_list(
+        'pk', 'text', 'text_html', 'created', 'author_id', 'author_name',
+        'path'
+    )[start:stop]
+    return [CommentRow(*row) for row in rows]
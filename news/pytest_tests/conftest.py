@@ -1,15 +1,129 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client
+from django.db.models import Case, DateTimeField, F, Value, When
 from django.urls import reverse
+from django.utils import timezone
 
+from news.cache import news_cache
+from news.counters import view_counter as counter
 from news.models import Comment, News
 
 User = get_user_model()
 
+SEED_TITLE = 'Архивная новость'
+SEED_NEWS_COUNT = 20
+SEED_COMMENTS_PER_NEWS = 5
+# Общие данные датированы прошлым, чтобы не мешать тестам свежих новостей.
+SEED_DATE = date(2000, 1, 1)
+
+
+def create_news(count, title=SEED_TITLE, start=None):
+    """Создаёт count новостей одним запросом, каждую на день старше."""
+    start = start or datetime.now()
+    News.objects.bulk_create(
+        News(
+            title=f'{title} {index}',
+            text='Текст',
+            date=start - timedelta(days=index),
+        )
+        for index in range(count)
+    )
+
+
+def create_comments(news_items, author, count, created=None):
+    """
+    Создаёт по count комментариев к каждой новости одним запросом.
+
+    created(index) - время создания index-го комментария каждой новости;
+    без него комментарии получают текущее время.
+    """
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in news_items
+        for index in range(count)
+    )
+    if created is not None:
+        Comment.objects.filter(news__in=news_items).update(created=Case(
+            *(
+                When(text=f'Комментарий {index}', then=Value(
+                    created(index), output_field=DateTimeField()
+                ))
+                for index in range(count)
+            ),
+            default=F('created'),
+        ))
+    Comment.objects.fill_root_paths()
+    Comment.objects.fill_author_names()
+    Comment.objects.fill_text_html()
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """
+    Один раз за сессию наполняет тестовую базу общими данными.
+
+    Каждый тест выполняется в транзакции, которая откатывается,
+    поэтому общие данные переживают все тесты. При запуске через
+    pytest-xdist у каждого воркера своя база SQLite.
+    """
+    with django_db_blocker.unblock():
+        author = User.objects.create(username='Постоянный читатель')
+        create_news(SEED_NEWS_COUNT, start=SEED_DATE)
+        create_comments(
+            News.objects.filter(title__startswith=SEED_TITLE),
+            author,
+            SEED_COMMENTS_PER_NEWS,
+        )
+
+
+@pytest.fixture(autouse=True)
+def query_budgets(settings):
+    """В тестах превышение бюджета SQL-запросов - ошибка."""
+    settings.QUERY_BUDGET_RAISE = True
+
+
+@pytest.fixture(autouse=True)
+def view_counter(settings):
+    """Счётчик просмотров без фонового потока, пустой в каждом тесте."""
+    settings.NEWS_VIEWS_FLUSH_INTERVAL = None
+    counter.clear()
+    yield counter
+    counter.stop()
+    counter.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кеши не переживают тест: id в базе переиспользуются."""
+    news_cache.clear()
+    cache.clear()
+    yield
+    news_cache.clear()
+    cache.clear()
+
+
+@pytest.fixture
+def seeded_news(db):
+    """Возвращает общие для всей сессии новости."""
+    return News.objects.filter(title__startswith=SEED_TITLE)
+
+
+@pytest.fixture
+def news_factory(db):
+    """Фабрика новостей, см. create_news."""
+    return create_news
+
+
+@pytest.fixture
+def comment_factory(db):
+    """Фабрика комментариев, см. create_comments."""
+    return create_comments
+
 
 @pytest.fixture
 def home_url():
@@ -84,30 +198,16 @@ def detail_url(news):
 
 
 @pytest.fixture
-def news_list():
+def news_list(news_factory):
     """Создает новости для тестирования."""
-    news_count = settings.NEWS_COUNT_ON_HOME_PAGE + 1
-    news_items = [
-        News(title=f'Заголовок {i}',
-             text='Текст',
-             date=datetime.now() - timedelta(days=i)
-             )
-        for i in range(news_count)
-    ]
-    News.objects.bulk_create(news_items)
-
-
-@pytest.fixture
-def comments(news, author):
-    """Создает 5 комментариев к новости от одного автора."""
-    for i in range(5):
-        comment = Comment.objects.create(
-            news=news,
-            author=author,
-            text=f'Комментарий {i}'
-        )
-        comment.created = datetime.today() - timedelta(days=i)
-        comment.save()
+    news_factory(settings.NEWS_COUNT_ON_HOME_PAGE + 1, title='Заголовок')
+
+
+@pytest.fixture
+def comments(news, author, comment_factory):
+    """Создает 5 комментариев к новости от одного автора, по одному в день."""
+    now = timezone.now()
+    comment_factory([news], author, 5, lambda i: now - timedelta(days=i))
 
 
 @pytest.fixture
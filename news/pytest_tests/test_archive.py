@@ -0,0 +1,85 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+
+from news.archive import purge_news
+from news.models import Comment, News, Notification
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def thread(news, author, reader):
+    """Ветка с ответами и уведомлением плюс комментарий к другой новости."""
+    root = Comment.objects.create(news=news, author=author, text='Корень')
+    reply = Comment.objects.create(
+        news=news, author=reader, parent=root, text='Ответ'
+    )
+    Comment.objects.create(
+        news=news, author=author, parent=reply, text='Ответ на ответ'
+    )
+    Comment.objects.create(news=news, author=reader, text='Второй')
+    Notification.objects.create(comment=reply)
+    other = News.objects.create(title='Другая', text='Текст')
+    Comment.objects.create(news=other, author=author, text='Чужой')
+    return root
+
+
+def read_archive(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        return [json.loads(line) for line in archive]
+
+
+def test_purge_archives_and_deletes(tmp_path, news, thread):
+    deleted, path = purge_news(news.pk, tmp_path, batch_size=1)
+    assert deleted == 4
+    assert not News.objects.filter(pk=news.pk).exists()
+    assert not Notification.objects.exists()
+    assert not Comment.objects.filter(news_id=news.pk).exists()
+    assert Comment.objects.filter(text='Чужой').exists()
+    rows = read_archive(path)
+    assert rows[0]['type'] == 'news'
+    assert rows[0]['title'] == news.title
+    comments = [row for row in rows if row['type'] == 'comment']
+    assert len(comments) == 4
+    order = [row['id'] for row in comments]
+    for row in comments:
+        if row['parent_id']:
+            assert order.index(row['id']) < order.index(row['parent_id'])
+
+
+def test_purge_without_archive(news, thread):
+    assert purge_news(news.pk) == (4, None)
+    assert purge_news(news.pk) == (0, None)
+
+
+def test_purge_command(tmp_path, news, thread):
+    stdout = StringIO()
+    call_command(
+        'purge_news', str(news.pk), '--archive-dir', str(tmp_path),
+        stdout=stdout,
+    )
+    assert 'удалено комментариев: 4' in stdout.getvalue()
+    assert len(list(tmp_path.glob(f'news-{news.pk}-*.jsonl.gz'))) == 1
+
+
+def test_admin_routes_large_news_through_purge(
+    settings, tmp_path, client, news, thread
+):
+    settings.NEWS_ARCHIVE_ROOT = tmp_path
+    settings.NEWS_PURGE_ADMIN_THRESHOLD = 2
+    admin = User.objects.create_superuser('Админ', 'admin@example.com', 'x')
+    client.force_login(admin)
+    url = reverse('admin:news_news_delete', args=(news.pk,))
+    assert client.get(url).status_code == 200
+    response = client.post(url, {'post': 'yes'})
+    assert response.status_code == 302
+    assert not News.objects.filter(pk=news.pk).exists()
+    assert len(list(tmp_path.iterdir())) == 1
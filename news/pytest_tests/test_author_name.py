@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from news import tiers
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def forget_tables():
+    tiers._tables.clear()
+    yield
+    tiers._tables.clear()
+
+
+def test_name_set_on_create(comment, author):
+    assert comment.author_name == author.username
+
+
+def test_detail_skips_user_table(client, detail_url, comment, settings):
+    for projections in (True, False):
+        settings.NEWS_PROJECTIONS = projections
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(detail_url)
+        assert comment.author_name in response.content.decode()
+        assert not any(
+            User._meta.db_table in query['sql']
+            for query in context.captured_queries
+        )
+
+
+def test_rename_updates_comments_and_page(
+    client, detail_url, author, comment, django_capture_on_commit_callbacks
+):
+    client.get(detail_url)
+    author.username = 'Граф Толстой'
+    with django_capture_on_commit_callbacks(execute=True):
+        author.save()
+    comment.refresh_from_db()
+    assert comment.author_name == 'Граф Толстой'
+    assert 'Граф Толстой' in client.get(detail_url).content.decode()
+
+
+def test_rename_updates_cold_comments(
+    client, news, detail_url, author, comment,
+    django_capture_on_commit_callbacks,
+):
+    Comment.objects.filter(pk=comment.pk).update(
+        created=timezone.now() - timedelta(days=400)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        assert tiers.archive_news_comments(news.pk) == 1
+        author.username = 'Граф Толстой'
+        author.save()
+    response = client.get(detail_url)
+    [row] = response.context['comments']
+    assert row.archived
+    assert row.author_name == 'Граф Толстой'
+
+
+def test_other_updates_skip_comments(
+    author, comment, django_assert_num_queries
+):
+    author.last_login = timezone.now()
+    with django_assert_num_queries(1):
+        author.save(update_fields=('last_login',))
+
+
+def test_fill_author_names(news, author):
+    Comment.objects.bulk_create([Comment(news=news, author=author, text='Т')])
+    assert Comment.objects.fill_author_names() == 1
+    assert Comment.objects.get(news=news).author_name == author.username
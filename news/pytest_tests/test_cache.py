@@ -0,0 +1,73 @@
+from datetime import date
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news import cache
+from news.cache import NewsCache, get_news, news_cache
+
+pytestmark = pytest.mark.django_db
+
+
+def test_hot_news_served_without_query(
+    client, detail_url, news, django_assert_num_queries
+):
+    """Повторный запрос новости не обращается к таблице новостей."""
+    client.get(detail_url)
+    with django_assert_num_queries(0):
+        cached = get_news(news.pk)
+    assert (cached.pk, cached.title, cached.text) == (
+        news.pk, news.title, news.text
+    )
+    assert news_cache.stats()['hits'] == 1
+
+
+def test_missing_news_is_404(client):
+    response = client.get(reverse('news:detail', args=(10 ** 9,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_save_and_delete_invalidate_cache(news):
+    """Сигналы post_save и post_delete сбрасывают запись кеша."""
+    get_news(news.pk)
+    news.title = 'Новый заголовок'
+    news.save()
+    assert get_news(news.pk).title == 'Новый заголовок'
+    news.delete()
+    assert get_news(news.pk) is None
+
+
+def test_eviction_by_size(settings):
+    """При переполнении вытесняется давно не запрашивавшаяся новость."""
+    row = ('Заголовок', 'Текст', date.today(), 0)
+    settings.NEWS_CACHE_MAX_BYTES = cache.row_size(row) * 2
+    lru = NewsCache()
+    lru.set(1, row)
+    lru.set(2, row)
+    lru.get(1)
+    lru.set(3, row)
+    assert lru.get(2) is None
+    assert lru.get(1) == row
+    assert lru.get(3) == row
+    assert lru.stats()['evictions'] == 1
+
+
+def test_expiration(settings, monkeypatch):
+    settings.NEWS_CACHE_TTL = 10
+    lru = NewsCache()
+    lru.set(1, ('Заголовок', 'Текст', date.today(), 0))
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now + 11)
+    assert lru.get(1) is None
+    assert lru.stats()['expirations'] == 1
+
+
+def test_stats_for_staff_only(client, author, client_with_login):
+    url = reverse('news:stats')
+    assert client_with_login.get(url).status_code == HTTPStatus.FORBIDDEN
+    author.is_staff = True
+    author.save()
+    response = client_with_login.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert set(response.json()) == {'news_cache', 'view_counter'}
@@ -1,7 +1,11 @@
 import pytest
 from django.conf import settings
+from django.urls import reverse
 
 from news.forms import CommentForm
+from news.models import News
+from news.projections import CommentRow, NewsRow
+from news.pytest_tests.conftest import SEED_COMMENTS_PER_NEWS
 
 
 @pytest.mark.django_db
@@ -100,3 +104,74 @@ class TestNews:
         timestamps = [news.date for news in news_list]
         sorted_timestamps = sorted(timestamps, reverse=True)
         assert timestamps == sorted_timestamps
+
+
+@pytest.mark.django_db
+class TestStreamingDetail:
+    """Тесты потоковой отдачи страницы новости."""
+
+    @pytest.fixture(autouse=True)
+    def streaming(self, settings):
+        settings.NEWS_DETAIL_STREAMING = True
+        settings.NEWS_DETAIL_STREAM_CHUNK = 2
+
+    def test_comments_streamed_after_article(
+        self, client, detail_url, comments
+    ):
+        """Комментарии идут после текста новости в порядке дерева."""
+        response = client.get(detail_url)
+        assert response.streaming
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        assert len(chunks) > 3
+        assert 'Текст' in chunks[0]
+        html = ''.join(chunks)
+        positions = [html.index(f'Комментарий {i}') for i in range(5)]
+        assert positions == sorted(positions)
+        assert '</html>' in chunks[-1]
+
+    def test_empty_comments_message(self, client, detail_url):
+        """Без комментариев выводится заглушка."""
+        response = client.get(detail_url)
+        html = b''.join(response.streaming_content).decode()
+        assert 'Здесь никто ничего не написал' in html
+
+
+@pytest.mark.django_db
+class TestProjections:
+    """Тесты лёгкого пути чтения (NEWS_PROJECTIONS)."""
+
+    @pytest.fixture(autouse=True)
+    def projections(self, settings):
+        settings.NEWS_PROJECTIONS = True
+
+    def test_home_page_uses_rows(self, client, comment, home_url):
+        """Главная страница получает NewsRow с числом комментариев."""
+        response = client.get(home_url)
+        news_list = response.context['news_list']
+        assert all(isinstance(news, NewsRow) for news in news_list)
+        assert news_list[0] == NewsRow(
+            comment.news.pk, comment.news.title, comment.news.text,
+            News.objects.get(pk=comment.news.pk).date, 1
+        )
+        assert 'Комментариев: 1' in response.content.decode()
+
+    def test_detail_page_uses_rows(
+        self, client_with_login, detail_url, comment
+    ):
+        """Комментарии передаются как CommentRow, ссылки автора на месте."""
+        response = client_with_login.get(detail_url)
+        comments = response.context['comments']
+        assert comments == [CommentRow(
+            comment.pk, comment.text, comment.text_html, comment.created,
+            comment.author_id, comment.author_name, comment.path
+        )]
+        assert reverse('news:edit', args=(comment.pk,)) in (
+            response.content.decode()
+        )
+
+
+def test_seeded_news_comments(client, seeded_news):
+    """Общие данные сессии доступны тестам и видны на странице новости."""
+    news = seeded_news.first()
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    assert len(response.context['comments']) == SEED_COMMENTS_PER_NEWS
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from django.test.runner import DiscoverRunner
+
+from news.counters import ViewCounter
+from news.models import News
+from news.runner import NewsTestRunner
+
+pytestmark = pytest.mark.django_db
+
+
+def test_view_is_counted_without_db_write(
+    client, detail_url, news, settings
+):
+    """Просмотр виден на странице, но в базу пока не записан."""
+    settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT = None
+    client.get(detail_url)
+    response = client.get(detail_url)
+    assert response.context['views'] == 2
+    news.refresh_from_db()
+    assert news.views == 0
+
+
+def test_flush_persists_pending_views(
+    client, detail_url, news, view_counter, settings
+):
+    """flush() записывает накопленные просмотры одной транзакцией."""
+    settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT = None
+    for _ in range(3):
+        client.get(detail_url)
+    assert view_counter.flush() == 1
+    news.refresh_from_db()
+    assert news.views == 3
+    assert view_counter.pending_for(news.pk) == 0
+    response = client.get(detail_url)
+    assert response.context['views'] == 4
+
+
+def test_background_thread_flushes_on_threshold(settings):
+    """Фоновый поток сбрасывает буфер, когда набран порог."""
+    settings.NEWS_VIEWS_FLUSH_INTERVAL = 60
+    settings.NEWS_VIEWS_FLUSH_THRESHOLD = 2
+    counter = ViewCounter()
+    persisted = []
+    flushed = threading.Event()
+
+    def persist(pending):
+        persisted.append(dict(pending))
+        flushed.set()
+
+    counter.persist = persist
+    counter.increment(1)
+    counter.increment(1)
+    assert flushed.wait(timeout=5)
+    counter.increment(2)
+    counter.stop()
+    assert persisted == [{1: 2}, {2: 1}]
+
+
+def test_failed_flush_keeps_views(monkeypatch, news, view_counter):
+    """Если записать не удалось, просмотры остаются в буфере."""
+    from django.db import DatabaseError
+
+    def persist(pending):
+        raise DatabaseError
+
+    monkeypatch.setattr(view_counter, 'persist', persist)
+    view_counter.increment(news.pk)
+    assert view_counter.flush() == 0
+    assert view_counter.pending_for(news.pk) == 1
+    assert News.objects.get(pk=news.pk).views == 0
+
+
+def test_pending_total(news, view_counter):
+    """Общее число просмотров в буфере считается при каждом просмотре."""
+    view_counter.increment(news.pk)
+    view_counter.increment(news.pk)
+    view_counter.increment(news.pk + 1)
+    assert view_counter.pending_total() == 3
+    view_counter.clear()
+    assert view_counter.pending_total() == 0
+
+
+def test_runner_stops_counter_before_dropping_databases(
+    monkeypatch, settings, view_counter
+):
+    """Буфер не переживает тестовые базы: запись при выходе некуда делать."""
+    settings.NEWS_VIEWS_FLUSH_INTERVAL = 60
+    persisted = []
+    monkeypatch.setattr(view_counter, 'persist', persisted.append)
+    monkeypatch.setattr(
+        DiscoverRunner, 'teardown_databases',
+        lambda self, old_config, **kwargs: persisted.append('teardown'),
+    )
+    view_counter.increment(1)
+    assert view_counter.thread is not None
+    NewsTestRunner().teardown_databases([])
+    assert view_counter.thread is None
+    assert persisted == [{1: 1}, 'teardown']
+    assert view_counter.pending_total() == 0
@@ -0,0 +1,77 @@
+from io import StringIO
+from statistics import mean
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.utils import timezone
+
+from news.models import Comment, News, render_text
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+ARGS = (
+    '--users', '5', '--news', '20', '--comments', '300',
+    '--seed', '1', '--end', '2024-01-01', '--days', '30',
+)
+
+
+def generate(*args):
+    out = StringIO()
+    call_command('generate_data', *ARGS, *args, stdout=out)
+    return out.getvalue()
+
+
+def test_creates_requested_counts():
+    users, news, comments = (
+        User.objects.count(), News.objects.count(), Comment.objects.count()
+    )
+    output = generate('--batch-size', '64')
+    assert User.objects.count() == users + 5
+    assert News.objects.count() == news + 20
+    assert Comment.objects.count() == comments + 300
+    assert 'строк в минуту' in output
+
+
+def test_threads_are_consistent():
+    generate()
+    comments = Comment.objects.select_related('news', 'parent', 'author')
+    assert comments.filter(parent__isnull=False).exists()
+    for comment in comments:
+        assert comment.text_html == render_text(comment.text)
+        assert comment.author_name == comment.author.username
+        published = timezone.localtime(comment.created).date()
+        assert published >= comment.news.date
+        if comment.parent is not None:
+            assert comment.parent.news_id == comment.news_id
+            assert comment.path.startswith(comment.parent.path)
+            assert comment.created >= comment.parent.created
+
+
+def test_comments_follow_zipf():
+    generate('--zipf', '1.5')
+    counts = list(
+        News.objects.annotate(total=Count('comment'))
+        .filter(total__gt=0).values_list('total', flat=True)
+    )
+    assert max(counts) > 3 * mean(counts)
+
+
+def generated_texts():
+    last = Comment.objects.order_by('-pk').values_list('pk', flat=True)
+    after = last.first() or 0
+    generate()
+    return list(
+        Comment.objects.filter(pk__gt=after)
+        .order_by('pk').values_list('text', flat=True)
+    )
+
+
+def test_same_seed_gives_same_data():
+    first = generated_texts()
+    second = generated_texts()
+    assert len(first) == 300
+    assert first == second
@@ -0,0 +1,86 @@
+import json
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+import pytest
+from django.urls import reverse
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+pytestmark = pytest.mark.django_db
+
+
+def read(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def test_rss_feed(client, news_list, settings):
+    """RSS содержит самые свежие новости в порядке убывания даты."""
+    settings.NEWS_FEED_SIZE = 5
+    response = client.get(reverse('news:rss'))
+    assert response['Content-Type'].startswith('application/rss+xml')
+    channel = ElementTree.fromstring(read(response)).find('channel')
+    titles = [item.findtext('title') for item in channel.iter('item')]
+    assert titles == [f'Заголовок {index}' for index in range(5)]
+
+
+def test_atom_feed(client, news):
+    response = client.get(reverse('news:atom'))
+    feed = ElementTree.fromstring(read(response))
+    entry = feed.find(f'{ATOM}entry')
+    assert entry.findtext(f'{ATOM}title') == news.title
+    assert entry.find(f'{ATOM}link').get('href').endswith(
+        reverse('news:detail', args=(news.pk,))
+    )
+
+
+def test_self_link_ignores_query_string(client, news):
+    """Закешированная лента не содержит адрес первого запроса."""
+    for name in ('atom', 'json'):
+        url = reverse(f'news:{name}')
+        read(client.get(url, {'utm_source': 'spam'}))
+        body = read(client.get(url)).decode()
+        assert 'utm_source' not in body
+        assert f'http://testserver{url}' in body
+
+
+def test_json_feed(client, news):
+    response = client.get(reverse('news:json'))
+    feed = json.loads(read(response))
+    assert feed['version'] == 'https://jsonfeed.org/version/1.1'
+    assert feed['items'][0]['title'] == news.title
+
+
+def test_feed_is_streamed_then_cached(client, news):
+    """Первая выдача ленты потоковая, повторная берётся из кеша."""
+    url = reverse('news:rss')
+    first = client.get(url)
+    assert first.streaming
+    body = read(first)
+    second = client.get(url)
+    assert not second.streaming
+    assert second.content == body
+
+
+def test_if_none_match_costs_no_queries(
+    client, news, django_assert_num_queries
+):
+    url = reverse('news:rss')
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_news_save_changes_etag(client, news):
+    """Сохранение новости начинает новое поколение ленты."""
+    url = reverse('news:json')
+    etag = client.get(url)['ETag']
+    news.title = 'Обновлённый заголовок'
+    news.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+    assert 'Обновлённый заголовок' in read(response).decode()
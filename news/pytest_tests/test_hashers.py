@@ -0,0 +1,70 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, check_password, get_hasher
+)
+from django.core.management import call_command
+
+from news.hashers import hashing_pool
+
+User = get_user_model()
+
+PASSWORD = 'Пароль-для-теста'
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashing(settings):
+    """Небольшое число итераций, чтобы тесты не тратили время на PBKDF2."""
+    settings.PASSWORD_HASHER_ITERATIONS = 1000
+
+
+@pytest.fixture
+def pool(settings):
+    settings.PASSWORD_HASHING_PROCESSES = 1
+    yield hashing_pool
+    hashing_pool.shutdown()
+
+
+def test_iterations_come_from_settings(settings):
+    settings.PASSWORD_HASHER_ITERATIONS = 1500
+    assert get_hasher().encode(PASSWORD, 'salt').startswith(
+        'pbkdf2_sha256$1500$'
+    )
+
+
+def test_pool_hashes_like_request_process(pool):
+    """Хеш, посчитанный в пуле процессов, совпадает с обычным."""
+    encoded = get_hasher().encode(PASSWORD, 'salt')
+    assert encoded == PBKDF2PasswordHasher().encode(PASSWORD, 'salt', 1000)
+    assert check_password(PASSWORD, encoded)
+    assert not check_password('не тот пароль', encoded)
+
+
+def test_default_hasher_passwords_still_valid():
+    """Пароли, созданные стандартным хешером, по-прежнему принимаются."""
+    encoded = PBKDF2PasswordHasher().encode(PASSWORD, 'salt')
+    assert check_password(PASSWORD, encoded)
+
+
+@pytest.mark.django_db
+def test_password_is_rehashed_on_login(settings, client, login_url):
+    """После смены стоимости пароль перехешируется при входе."""
+    user = User.objects.create_user(username='Пользователь', password=PASSWORD)
+    settings.PASSWORD_HASHER_ITERATIONS = 2000
+    response = client.post(
+        login_url, data={'username': user.username, 'password': PASSWORD}
+    )
+    assert response.status_code == 302
+    user.refresh_from_db()
+    assert user.password.startswith('pbkdf2_sha256$2000$')
+
+
+def test_benchmark_suggests_iterations():
+    stdout = StringIO()
+    call_command(
+        'benchmark', 'hasher', '--iterations', '1000', '--repeat', '1',
+        stdout=stdout,
+    )
+    assert 'PASSWORD_HASHER_ITERATIONS = ' in stdout.getvalue()
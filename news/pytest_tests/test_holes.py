@@ -0,0 +1,84 @@
+import re
+
+import pytest
+
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+CSRF_VALUE = re.compile(r'name="csrfmiddlewaretoken" value="[^"]+"')
+
+
+@pytest.fixture(autouse=True)
+def page_cache(settings):
+    settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT = 60
+
+
+def normalize(content):
+    """Без CSRF-токена и различий в пробелах между тегами."""
+    html = CSRF_VALUE.sub('', content.decode())
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+@pytest.fixture
+def reply(comment, reader):
+    return Comment.objects.create(
+        news=comment.news, author=reader, parent=comment, text='Ответ'
+    )
+
+
+def test_users_share_one_rendered_page(
+    client, client_with_login, detail_url, reply
+):
+    """Второй пользователь получает страницу без рендеринга шаблона."""
+    client.get(detail_url)
+    response = client_with_login.get(detail_url)
+    rendered = [template.name for template in response.templates]
+    assert 'news/detail.html' not in rendered
+    assert 'includes/comments.html' not in rendered
+
+
+@pytest.mark.parametrize(
+    'name', ('client', 'client_with_login', 'client_with_reader_login')
+)
+def test_filled_page_matches_uncached(
+    request, settings, name, detail_url, reply
+):
+    """Собранная из кеша страница совпадает с обычной для любого клиента."""
+    client = request.getfixturevalue(name)
+    client.get(detail_url)
+    cached = client.get(detail_url, {'reply_to': reply.parent_id})
+    settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT = None
+    plain = client.get(detail_url, {'reply_to': reply.parent_id})
+    views = re.compile(r'Просмотров: \d+')
+    assert views.sub('', normalize(cached.content)) == views.sub(
+        '', normalize(plain.content)
+    )
+
+
+def test_personal_fragments(
+    client, client_with_login, detail_url, comment, reply, edit_url
+):
+    author_page = client_with_login.get(detail_url).content.decode()
+    anonymous_page = client.get(detail_url).content.decode()
+    assert author_page.count(edit_url) == 1
+    assert 'csrfmiddlewaretoken' in author_page
+    assert 'Лев Толстой' in author_page
+    assert edit_url not in anonymous_page
+    assert 'Ответить' not in anonymous_page
+    assert 'csrfmiddlewaretoken' not in anonymous_page
+
+
+def test_views_are_counted_on_cached_page(client, detail_url):
+    client.get(detail_url)
+    response = client.get(detail_url)
+    assert 'Просмотров: 2' in response.content.decode()
+
+
+def test_new_comment_resets_page(
+    client_with_login, detail_url, django_capture_on_commit_callbacks
+):
+    client_with_login.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        client_with_login.post(detail_url, data={'text': 'Свежий'})
+    assert 'Свежий' in client_with_login.get(detail_url).content.decode()
@@ -2,9 +2,10 @@ from http import HTTPStatus
 
 import pytest
 from django.contrib.auth import get_user
+from django.urls import reverse
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.forms import BAD_WORDS, TOO_DEEP, WARNING
+from news.models import Comment, News
 
 pytestmark = pytest.mark.django_db
 
@@ -51,6 +52,32 @@ def test_user_cant_delete_comment_of_another_user(
     assert Comment.objects.count() == initial_comment_count
 
 
+def test_author_cant_delete_comment_with_replies_of_others(
+    client_with_login, delete_url, comment, news, reader
+):
+    """Каскад не должен удалять чужие ответы вместе с комментарием."""
+    reply = Comment.objects.create(
+        news=news, author=reader, parent=comment, text='Ответ'
+    )
+    response = client_with_login.delete(delete_url)
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert Comment.objects.filter(pk__in=(comment.pk, reply.pk)).count() == 2
+    response = client_with_login.get(delete_url)
+    assert response.context['has_foreign_replies']
+    assert 'type="submit"' not in response.content.decode()
+
+
+def test_author_deletes_comment_with_own_replies(
+    client_with_login, delete_url, comment, news, author
+):
+    Comment.objects.create(
+        news=news, author=author, parent=comment, text='Дополнение'
+    )
+    response = client_with_login.delete(delete_url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert not Comment.objects.filter(news=news).exists()
+
+
 def test_author_can_edit_comment(client_with_login, edit_url, comment, news):
     """
     Проверяет, что автор комментария может отредактировать свой комментарий.
@@ -175,3 +202,82 @@ def test_user_cant_use_bad_words(client_with_login, detail_url):
     assert 'text' in response.context['form'].errors
     assert WARNING in response.context['form'].errors['text']
     assert Comment.objects.count() == initial_comment_count
+
+
+def test_reply_is_placed_under_parent(
+    client_with_reader_login, detail_url, comment, author
+):
+    """
+    Ответ хранит путь родителя и выводится сразу под ним.
+
+    Ассерты:
+    - Путь ответа начинается с пути родителя, глубина ответа 1.
+    - В дереве ответ стоит между родителем и более поздним комментарием.
+    """
+    later = Comment.objects.create(
+        news=comment.news, author=author, text='Поздний комментарий'
+    )
+    response = client_with_reader_login.post(
+        detail_url, data={'text': COMMENT_TEXT, 'parent': comment.pk}
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    reply = Comment.objects.get(text=COMMENT_TEXT)
+    assert reply.parent == comment
+    assert reply.path.startswith(comment.path)
+    assert reply.depth == 1
+    assert list(Comment.objects.thread(comment.news_id)) == [
+        comment, reply, later
+    ]
+
+
+def test_cant_reply_to_comment_of_another_news(
+    client_with_login, comment, news_factory
+):
+    """Ответить можно только на комментарий к той же новости."""
+    news_factory(1, title='Другая новость')
+    other_news = News.objects.get(title='Другая новость 0')
+    url = reverse('news:detail', args=(other_news.pk,))
+    initial_comment_count = Comment.objects.count()
+    response = client_with_login.post(
+        url, data={'text': COMMENT_TEXT, 'parent': comment.pk}
+    )
+    assert 'parent' in response.context['form'].errors
+    assert Comment.objects.count() == initial_comment_count
+
+
+def test_reply_depth_is_limited(
+    client_with_login, detail_url, comment, author, settings
+):
+    """Ответ глубже COMMENT_MAX_DEPTH уровней отклоняется."""
+    settings.COMMENT_MAX_DEPTH = 2
+    reply = Comment.objects.create(
+        news=comment.news, author=author, parent=comment, text='Ответ'
+    )
+    initial_comment_count = Comment.objects.count()
+    response = client_with_login.post(
+        detail_url, data={'text': COMMENT_TEXT, 'parent': reply.pk}
+    )
+    assert TOO_DEEP in response.context['form'].errors['parent']
+    assert Comment.objects.count() == initial_comment_count
+
+
+def test_comment_thread_pages(client, comments, detail_url, settings):
+    """Дерево комментариев делится на страницы по COMMENTS_PER_PAGE."""
+    settings.COMMENTS_PER_PAGE = 2
+    first = client.get(detail_url)
+    assert len(first.context['comments']) == 2
+    assert first.context['next_page'] == 2
+    assert first.context['previous_page'] is None
+    last = client.get(detail_url, {'page': 3})
+    assert len(last.context['comments']) == 1
+    assert last.context['next_page'] is None
+    assert last.context['previous_page'] == 2
+
+
+@pytest.mark.parametrize('page', ('10001', '1' * 30))
+def test_comment_page_beyond_limit_is_not_found(
+    client, comments, detail_url, settings, page
+):
+    settings.COMMENTS_PER_PAGE = 2
+    response = client.get(detail_url, {'page': page})
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,46 @@
+import gzip
+
+import pytest
+
+from news.middleware import parse_accept_encoding
+
+pytestmark = pytest.mark.django_db
+
+
+def test_parse_accept_encoding():
+    """Проверяет разбор заголовка Accept-Encoding с весами."""
+    assert parse_accept_encoding('gzip;q=0.5, br, identity;q=0') == {
+        'gzip': 0.5, 'br': 1.0, 'identity': 0.0
+    }
+
+
+def test_gzip_response(client, news_list, home_url):
+    """Главная страница сжимается gzip, если клиент его принимает."""
+    response = client.get(home_url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    html = gzip.decompress(response.content).decode()
+    assert 'Заголовок 0' in html
+
+
+def test_no_compression_without_accept_encoding(client, home_url):
+    """Без Accept-Encoding ответ отдаётся как есть."""
+    response = client.get(home_url)
+    assert not response.has_header('Content-Encoding')
+
+
+def test_small_response_not_compressed(client, home_url, settings):
+    """Ответы короче COMPRESSION_MIN_LENGTH не сжимаются."""
+    settings.COMPRESSION_MIN_LENGTH = 10 ** 6
+    response = client.get(home_url, HTTP_ACCEPT_ENCODING='gzip')
+    assert not response.has_header('Content-Encoding')
+
+
+def test_streaming_detail_is_compressed(client, detail_url, settings):
+    """Потоковая страница новости сжимается на лету."""
+    settings.NEWS_DETAIL_STREAMING = True
+    response = client.get(detail_url, HTTP_ACCEPT_ENCODING='gzip')
+    assert response.streaming
+    assert response['Content-Encoding'] == 'gzip'
+    html = gzip.decompress(b''.join(response.streaming_content)).decode()
+    assert 'Заголовок' in html
@@ -0,0 +1,77 @@
+import pytest
+from django.urls import reverse
+
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+URL = reverse('news:my_comments')
+
+
+@pytest.fixture
+def many_comments(settings, news, author, reader, comment_factory):
+    """25 комментариев автора с одинаковым временем и чужой комментарий."""
+    settings.MY_COMMENTS_PER_PAGE = 10
+    comment_factory([news], author, 25)
+    comment_factory([news], reader, 1)
+    Comment.objects.filter(author=author).update(
+        created=Comment.objects.first().created
+    )
+    return list(
+        Comment.objects.filter(author=author).order_by('-created', '-pk')
+    )
+
+
+def test_anonymous_is_redirected(client, login_url):
+    response = client.get(URL)
+    assert response.url == f'{login_url}?next={URL}'
+
+
+def test_keyset_pages_cover_all_own_comments(
+    client_with_login, many_comments
+):
+    """Страницы по курсору выдают все свои комментарии ровно по разу."""
+    seen, url, pages = [], URL, 0
+    while url:
+        response = client_with_login.get(url)
+        assert response.context['total'] == len(many_comments)
+        seen += response.context['comments']
+        cursor = response.context.get('next_cursor')
+        url = cursor and f'{URL}?after={cursor}'
+        pages += 1
+    assert pages == 3
+    assert [comment.pk for comment in seen] == [
+        comment.pk for comment in many_comments
+    ]
+
+
+def test_page_queries(
+    client_with_login, many_comments, django_assert_num_queries
+):
+    """Новости подгружаются в том же запросе, число берётся из кеша."""
+    client_with_login.get(URL)
+    with django_assert_num_queries(3):
+        response = client_with_login.get(URL)
+        assert all(
+            comment.news.title for comment in response.context['comments']
+        )
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    ('мусор', '99999999999999999999-1', '0-99999999999999999999999', '0-0'),
+)
+def test_bad_cursor_shows_first_page(
+    client_with_login, many_comments, cursor
+):
+    response = client_with_login.get(URL, {'after': cursor})
+    assert response.context['comments'][0] == many_comments[0]
+
+
+def test_new_comment_updates_total(
+    client_with_login, news, author, django_capture_on_commit_callbacks
+):
+    assert client_with_login.get(URL).context['total'] == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Новый')
+    assert client_with_login.get(URL).context['total'] == 1
@@ -0,0 +1,106 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+from news.models import Notification
+from news.notifications import process_batch
+
+pytestmark = pytest.mark.django_db
+
+FORM_DATA = {'text': 'Новый комментарий'}
+
+
+@pytest.fixture
+def webhook_sink():
+    """Поднимает локальный HTTP-сервер, собирающий тела POST-запросов."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers['Content-Length'])
+            received.append(json.loads(self.rfile.read(length)))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/', received
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def closed_port_url():
+    """URL, по которому гарантированно никто не слушает."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+@pytest.fixture
+def discussion(author, reader, comment, client_with_reader_login, detail_url):
+    """Читатель отвечает в обсуждении, где уже писал автор."""
+    author.email = 'author@example.com'
+    author.save()
+    reader.email = 'reader@example.com'
+    reader.save()
+    client_with_reader_login.post(detail_url, data=FORM_DATA)
+    return Notification.objects.get()
+
+
+def test_comment_is_queued_not_sent(discussion):
+    """POST комментария только пишет запись в outbox."""
+    assert discussion.comment.text == FORM_DATA['text']
+    assert discussion.sent is None
+    assert mail.outbox == []
+
+
+def test_email_goes_to_other_commenters(discussion):
+    """Письмо получают участники обсуждения, кроме автора комментария."""
+    assert process_batch(10, 2, 5) == 1
+    assert [message.to for message in mail.outbox] == [['author@example.com']]
+    discussion.refresh_from_db()
+    assert discussion.sent is not None
+    assert discussion.email_sent
+    assert process_batch(10, 2, 5) == 0
+
+
+def test_webhook_receives_payload(settings, discussion, webhook_sink):
+    """Вебхук получает JSON с новостью, комментарием и адресатами."""
+    url, received = webhook_sink
+    settings.NOTIFICATIONS_WEBHOOK_URL = url
+    call_command('process_outbox', '--once', stdout=StringIO())
+    assert len(received) == 1
+    assert received[0]['comment']['text'] == FORM_DATA['text']
+    assert received[0]['recipients'] == ['Лев Толстой']
+    discussion.refresh_from_db()
+    assert discussion.webhook_sent
+
+
+def test_failed_webhook_is_retried_later(
+    settings, discussion, closed_port_url
+):
+    """Ошибка доставки откладывает повтор, письмо второй раз не уходит."""
+    settings.NOTIFICATIONS_WEBHOOK_URL = closed_port_url
+    assert process_batch(10, 2, 5) == 1
+    discussion.refresh_from_db()
+    assert discussion.sent is None
+    assert discussion.attempts == 1
+    assert discussion.email_sent
+    assert not discussion.webhook_sent
+    assert discussion.error
+    assert process_batch(10, 2, 5) == 0
+    Notification.objects.update(next_attempt=discussion.created)
+    assert process_batch(10, 2, 5) == 1
+    assert len(mail.outbox) == 1
@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from news.forms import BAD_WORDS, BAD_WORDS_MATCHER
+from news.profanity import BadWordMatcher, normalize
+
+
+@pytest.mark.parametrize(
+    'text',
+    (
+        f'Какой-то текст, {BAD_WORDS[0]}, еще текст',
+        'Р-е-д-и-с-к-а!',
+        'peдиcкa',
+        'рееедиииска',
+        'Н Е Г О Д Я Й',
+        'не_го_дяй',
+        'н.е.г.о.д.я.й',
+        'ре\u00adдис\u200bка',
+    ),
+)
+def test_masked_bad_words_are_found(text):
+    assert BAD_WORDS_MATCHER.search(text)
+
+
+@pytest.mark.parametrize(
+    'text',
+    (
+        'Текст комментария',
+        'Отличная новость!',
+        'Редис и свёкла',
+        'Редис каждый день полезен',
+        'Надо добавить редис, капусту',
+        'Купил редис,капусту и лук',
+        'редис.Капуста',
+        '',
+    ),
+)
+def test_clean_text_passes(text):
+    assert not BAD_WORDS_MATCHER.search(text)
+
+
+def test_normalize_folds_case_homoglyphs_and_repeats():
+    assert normalize('ПpИИИвеееТ, м0й  дРуг!') == 'привет мой друг'
+
+
+def test_normalize_joins_only_single_letters():
+    assert normalize('Н Е Г О Д Я Й') == 'негодяй'
+    assert normalize('Редис и свёкла') == 'редис и свекла'
+    assert normalize('р - е - д, редис') == 'ред редис'
+    assert normalize('редис,капусту') == 'редис капусту'
+
+
+def test_overlapping_words_use_failure_links():
+    """Слово внутри неудавшегося более длинного совпадения тоже находится."""
+    matcher = BadWordMatcher(['абвгд', 'вгж'])
+    assert matcher.search('абвгж')
+    assert not matcher.search('абвг')
+
+
+def test_benchmark_compares_loop_and_matcher():
+    stdout = StringIO()
+    call_command(
+        'benchmark', 'profanity', '--terms', '100', '--repeat', '5',
+        stdout=stdout,
+    )
+    assert 'автомат' in stdout.getvalue()
@@ -0,0 +1,63 @@
+import logging
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import ResolverMatch, reverse
+
+from news import urls
+from news.middleware import QueryBudgetMiddleware
+from news.models import News
+from news.querybudget import QueryBudgetExceeded, fingerprint, query_budget
+
+pytestmark = pytest.mark.django_db
+
+
+@query_budget(2)
+def n_plus_one(request):
+    """Запрашивает каждую новость отдельно."""
+    for pk in News.objects.values_list('pk', flat=True)[:3]:
+        News.objects.get(pk=pk)
+    return HttpResponse()
+
+
+def call_with_middleware(view):
+    def get_response(request):
+        request.resolver_match = ResolverMatch(view, (), {}, 'n_plus_one')
+        return view(request)
+    middleware = QueryBudgetMiddleware(get_response)
+    return middleware(RequestFactory().get('/'))
+
+
+def test_fingerprint_drops_literals_and_in_lists():
+    assert fingerprint(
+        "SELECT * FROM t WHERE id IN (%s, %s,  %s) AND s = 'x' LIMIT 21"
+    ) == 'SELECT * FROM t WHERE id IN (...) AND s = ? LIMIT ?'
+
+
+def test_every_news_route_has_budget(settings):
+    for pattern in urls.urlpatterns:
+        assert f'news:{pattern.name}' in settings.QUERY_BUDGETS
+
+
+def test_exceeded_budget_raises_in_tests(client, settings):
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded, match='news:home'):
+        client.get(reverse('news:home'))
+
+
+def test_exceeded_budget_logs_duplicates(settings, caplog):
+    settings.QUERY_BUDGET_RAISE = False
+    with caplog.at_level(logging.WARNING, logger='news.middleware'):
+        call_with_middleware(n_plus_one)
+    message = caplog.records[0].getMessage()
+    assert '4 SQL-запросов при бюджете 2' in message
+    assert '3 x SELECT' in message
+
+
+def test_streaming_queries_are_counted(client, settings, news, comment):
+    settings.NEWS_DETAIL_STREAMING = True
+    settings.QUERY_BUDGETS = {'news:detail': 1}
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
@@ -0,0 +1,121 @@
+import os
+from http import HTTPStatus
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from news import routers
+from news.middleware import ReplicaRoutingMiddleware
+from news.models import News
+
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replicas(settings, monkeypatch):
+    """Настраивает одну реплику с управляемым отставанием."""
+    settings.DATABASE_REPLICAS = [REPLICA]
+    lag = {REPLICA: 0.0}
+    monkeypatch.setattr(routers, 'cached_replica_lag', lag.get)
+    return lag
+
+
+@pytest.fixture
+def router():
+    return routers.ReplicaRouter()
+
+
+def route_request(method, cookies=None, status=HTTPStatus.OK):
+    """Пропускает запрос через middleware и возвращает базу для чтения."""
+    decisions = []
+
+    def get_response(request):
+        decisions.append(routers.ReplicaRouter().db_for_read(News))
+        return HttpResponse(status=status)
+
+    request = getattr(RequestFactory(), method)('/')
+    request.COOKIES.update(cookies or {})
+    response = ReplicaRoutingMiddleware(get_response)(request)
+    return decisions[0], response
+
+
+def test_reads_go_to_primary_outside_replica_block(replicas, router):
+    assert router.db_for_read(News) is None
+    assert router.db_for_write(News) == 'default'
+
+
+def test_reads_go_to_replica_inside_replica_block(replicas, router):
+    with routers.use_replicas():
+        assert router.db_for_read(News) == REPLICA
+
+
+def test_lagging_replica_falls_back_to_primary(replicas, router, settings):
+    replicas[REPLICA] = settings.REPLICA_MAX_LAG_SECONDS + 1
+    with routers.use_replicas():
+        assert router.db_for_read(News) is None
+
+
+def test_replicas_are_not_migrated(replicas, router):
+    assert router.allow_migrate(REPLICA, 'news') is False
+    assert router.allow_migrate('default', 'news') is None
+
+
+def test_get_request_reads_from_replica(replicas):
+    db, response = route_request('get')
+    assert db == REPLICA
+    assert not response.cookies
+
+
+def test_streamed_response_reads_from_replica(replicas):
+    def content():
+        yield routers.ReplicaRouter().db_for_read(News)
+
+    request = RequestFactory().get('/')
+    response = ReplicaRoutingMiddleware(
+        lambda request: StreamingHttpResponse(content())
+    )(request)
+    assert list(response.streaming_content) == [REPLICA.encode()]
+
+
+def test_post_sets_sticky_cookie(replicas, settings):
+    db, response = route_request('post')
+    assert db is None
+    cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+    assert cookie['max-age'] == settings.REPLICA_STICKY_SECONDS
+
+
+def test_failed_post_does_not_set_sticky_cookie(replicas):
+    _, response = route_request('post', status=HTTPStatus.FORBIDDEN)
+    assert not response.cookies
+
+
+def test_sticky_user_reads_from_primary(replicas, settings):
+    db, _ = route_request(
+        'get', cookies={settings.REPLICA_STICKY_COOKIE: '1'}
+    )
+    assert db is None
+
+
+def test_no_replicas_configured():
+    db, response = route_request('get')
+    assert db is None
+    assert not response.cookies
+
+
+def test_sqlite_lag_estimate(tmp_path, settings, monkeypatch):
+    primary = tmp_path / 'db.sqlite3'
+    replica = tmp_path / 'replica.sqlite3'
+    primary.write_bytes(b'')
+    replica.write_bytes(b'')
+    monkeypatch.setitem(
+        routers.connections.databases, 'default',
+        {'ENGINE': 'django.db.backends.sqlite3', 'NAME': primary}
+    )
+    monkeypatch.setitem(
+        routers.connections.databases, REPLICA,
+        {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(replica)}
+    )
+    stat = replica.stat()
+    os.utime(replica, (stat.st_atime, stat.st_mtime - 10))
+    assert routers.replica_lag(REPLICA) == pytest.approx(10, abs=1)
@@ -0,0 +1,86 @@
+import gzip
+from xml.etree import ElementTree
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from news import sitemaps
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+SHARD_SIZE = 10
+BASE_URL = 'https://ya.news'
+NS = {'s': sitemaps.XMLNS}
+
+
+@pytest.fixture
+def build(tmp_path):
+    def build(compress=False):
+        return sitemaps.build(
+            tmp_path, BASE_URL, BASE_URL + '/sitemaps/', SHARD_SIZE, compress
+        )
+    return build
+
+
+def shard_of(news):
+    return str((news.pk - 1) // SHARD_SIZE)
+
+
+def test_index_and_shards(build, tmp_path, seeded_news):
+    """Каждая новость попадает ровно в один шард, индекс ссылается на все."""
+    result = build()
+    index = ElementTree.parse(tmp_path / sitemaps.INDEX)
+    locations = index.findall('s:sitemap/s:loc', NS)
+    assert len(locations) == len(result['written'])
+    urls = []
+    for shard in result['written']:
+        tree = ElementTree.parse(tmp_path / f'sitemap-{shard}.xml')
+        shard_urls = tree.findall('s:url/s:loc', NS)
+        assert len(shard_urls) <= SHARD_SIZE
+        urls += [url.text for url in shard_urls]
+    assert sorted(urls) == sorted(
+        BASE_URL + reverse('news:detail', args=(pk,))
+        for pk in News.objects.values_list('pk', flat=True)
+    )
+
+
+def test_second_run_rewrites_nothing(build, seeded_news):
+    first = build()
+    second = build()
+    assert second['written'] == []
+    assert sorted(second['skipped']) == sorted(first['written'])
+
+
+def test_only_touched_shard_is_rewritten(build, seeded_news):
+    build()
+    news = seeded_news.first()
+    news.date = news.date.replace(year=2001)
+    news.save()
+    assert build()['written'] == [shard_of(news)]
+
+
+def test_emptied_shard_is_removed(build, tmp_path, news):
+    build()
+    shard = shard_of(news)
+    assert (tmp_path / f'sitemap-{shard}.xml').exists()
+    News.objects.filter(pk__gt=int(shard) * SHARD_SIZE).delete()
+    assert shard in build()['removed']
+    assert not (tmp_path / f'sitemap-{shard}.xml').exists()
+
+
+def test_gzip_shards(build, tmp_path, news):
+    build(compress=True)
+    shard = shard_of(news)
+    with gzip.open(tmp_path / f'sitemap-{shard}.xml.gz') as stream:
+        tree = ElementTree.parse(stream)
+    assert tree.findall('s:url', NS)
+    index = (tmp_path / sitemaps.INDEX).read_text()
+    assert f'sitemap-{shard}.xml.gz' in index
+
+
+def test_command(tmp_path, news, capsys):
+    call_command('build_sitemap', root=tmp_path, shard_size=SHARD_SIZE)
+    assert (tmp_path / sitemaps.INDEX).exists()
+    assert 'Записано шардов' in capsys.readouterr().out
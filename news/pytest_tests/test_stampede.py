@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from news import stampede
+from news.models import Comment
+
+KEY = 'test:stampede'
+
+
+def slow_compute(calls, value='свежее'):
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return value
+    return compute
+
+
+def test_fresh_value_is_not_recomputed():
+    calls = []
+    assert stampede.get_or_compute(KEY, slow_compute(calls), 60) == 'свежее'
+    assert stampede.get_or_compute(KEY, slow_compute(calls), 60) == 'свежее'
+    assert len(calls) == 1
+
+
+def test_stale_value_served_while_other_recomputes():
+    """Пока блокировка у другого процесса, отдаётся устаревшая копия."""
+    cache.set(KEY, ('устаревшее', 0.1, time.time() - 1), 60)
+    assert stampede.acquire(KEY)
+    calls = []
+    assert stampede.get_or_compute(KEY, slow_compute(calls), 60) == (
+        'устаревшее'
+    )
+    assert calls == []
+
+
+def test_expired_value_recomputed_by_lock_holder():
+    cache.set(KEY, ('устаревшее', 0.1, time.time() - 1), 60)
+    calls = []
+    assert stampede.get_or_compute(KEY, slow_compute(calls), 60) == 'свежее'
+    assert cache.get(KEY)[0] == 'свежее'
+    assert cache.get(stampede.lock_key(KEY)) is None
+
+
+def test_early_expiration_depends_on_compute_time(settings):
+    now = time.time()
+    assert not stampede.expired(now + 1, 0, now)
+    assert stampede.expired(now + 1, 1000, now)
+    settings.CACHE_EARLY_EXPIRATION_BETA = 0
+    assert not stampede.expired(now + 1, 1000, now)
+
+
+def test_concurrent_misses_compute_once():
+    """Одновременные промахи ждут единственного пересчёта."""
+    calls, results = [], []
+    compute = slow_compute(calls)
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                stampede.get_or_compute(KEY, compute, 60)
+            )
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ['свежее'] * 10
+
+
+def compute_in_child(marker_dir):
+    def compute():
+        (marker_dir / f'{multiprocessing.current_process().pid}').touch()
+        time.sleep(0.3)
+        return 'свежее'
+    stampede.get_or_compute(KEY, compute, 60)
+
+
+def test_single_flight_across_processes(settings, tmp_path):
+    """С файловым кешем пересчитывает только один процесс из нескольких."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'news.cache_backends.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        }
+    }
+    markers = tmp_path / 'markers'
+    markers.mkdir()
+    context = multiprocessing.get_context('fork')
+    processes = [
+        context.Process(target=compute_in_child, args=(markers,))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert len(list(markers.iterdir())) == 1
+    assert cache.get(KEY)[0] == 'свежее'
+
+
+@pytest.mark.django_db
+def test_new_comment_invalidates_detail_cache(
+    client, detail_url, news, author, django_capture_on_commit_callbacks
+):
+    client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Новый')
+    response = client.get(detail_url)
+    assert [comment.text for comment in response.context['comments']] == [
+        'Новый'
+    ]
@@ -0,0 +1,50 @@
+import pytest
+from django.conf import settings
+
+from news.startup import import_time_by_app, parse_importtime, profile
+
+
+@pytest.fixture(scope='module')
+def startup_report():
+    return profile()
+
+
+@pytest.fixture(scope='module')
+def lean_startup_report():
+    return profile(lean=True)
+
+
+def test_parse_importtime():
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       150 |        150 |   news.models\n'
+        'import time:      2000 |       2150 | news\n'
+    )
+    assert parse_importtime(output) == {'news.models': 0.00015, 'news': 0.002}
+
+
+def test_startup_within_budget(startup_report):
+    """Регрессия времени старта: django.setup() укладывается в бюджет."""
+    assert startup_report['setup'] < settings.STARTUP_TIME_BUDGET
+
+
+def test_startup_reports_every_app(startup_report):
+    assert {'django.contrib.admin', 'django.contrib.auth', 'news'} <= set(
+        startup_report['apps']
+    )
+    assert import_time_by_app(startup_report)['news'] > 0
+
+
+def test_auth_and_admin_urls_loaded_lazily(startup_report):
+    """
+    Адреса новостей разрешаются без URLconf авторизации и админки,
+    но первый reverse() загружает их: импорт лишь переносится на него.
+    """
+    for module in ('yanews.auth_urls', 'yanews.admin_urls'):
+        assert module not in startup_report['modules']
+        assert module in startup_report['reverse_modules']
+
+
+def test_lean_profile_skips_admin(lean_startup_report):
+    assert 'django.contrib.admin' not in lean_startup_report['apps']
+    assert 'django.contrib.admin' not in lean_startup_report['modules']
@@ -0,0 +1,42 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+TEXT = '<b>Первая</b> строка\nвторая & последняя'
+HTML = '&lt;b&gt;Первая&lt;/b&gt; строка<br>вторая &amp; последняя'
+
+
+def test_new_comment_is_rendered_on_save(
+    client_with_login, detail_url, news
+):
+    client_with_login.post(detail_url, data={'text': TEXT})
+    comment = Comment.objects.get(news=news)
+    assert comment.text_html == HTML
+    assert HTML in client_with_login.get(detail_url).content.decode()
+
+
+def test_edit_rerenders_html(client_with_login, edit_url, comment):
+    client_with_login.post(edit_url, data={'text': TEXT})
+    comment.refresh_from_db()
+    assert comment.text_html == HTML
+
+
+def test_update_fields_include_html(comment):
+    comment.text = TEXT
+    comment.save(update_fields=('text',))
+    comment.refresh_from_db()
+    assert comment.text_html == HTML
+
+
+def test_backfill_command(comment):
+    Comment.objects.filter(pk=comment.pk).update(text=TEXT, text_html='')
+    stdout = StringIO()
+    call_command('render_comments', '--batch-size', '1', stdout=stdout)
+    assert stdout.getvalue() == 'Обновлено комментариев: 1.\n'
+    comment.refresh_from_db()
+    assert comment.text_html == HTML
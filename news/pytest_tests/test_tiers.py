@@ -0,0 +1,274 @@
+import gzip
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from news import tiers
+from news.archive import purge_news
+from news.cache import news_cache
+from news.models import Comment, CommentArchive, News, Notification
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def forget_tables():
+    """Id архивов переиспользуются после отката транзакции теста."""
+    tiers._tables.clear()
+    yield
+    tiers._tables.clear()
+
+
+def comment_at(news, author, days, parent=None):
+    """Комментарий, написанный days дней назад."""
+    comment = Comment.objects.create(
+        news=news, author=author, parent=parent, text=f'{days} дней назад'
+    )
+    comment.created = timezone.now() - timedelta(days=days)
+    Comment.objects.filter(pk=comment.pk).update(created=comment.created)
+    return comment
+
+
+@pytest.fixture
+def thread(news, author, reader):
+    """
+    Три ветки: старая целиком, старая со свежим ответом и ещё одна
+    старая после неё; возвращает комментарии в порядке обхода.
+    """
+    old = comment_at(news, author, 400)
+    old_reply = comment_at(news, reader, 390, parent=old)
+    busy = comment_at(news, author, 380)
+    fresh_reply = comment_at(news, reader, 1, parent=busy)
+    later = comment_at(news, author, 370)
+    Notification.objects.create(comment=old_reply)
+    return [old, old_reply, busy, fresh_reply, later]
+
+
+@pytest.fixture
+def archived(thread, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        moved = tiers.archive_old_comments()
+    assert moved == 2
+    return thread
+
+
+def cold_table():
+    return CommentArchive.objects.get().table
+
+
+def queried(context, table):
+    return any(table in query['sql'] for query in context.captured_queries)
+
+
+def test_moves_old_prefix_of_thread(news, archived):
+    old, old_reply, busy, fresh_reply, later = archived
+    news.refresh_from_db()
+    assert news.archived_comments == 2
+    archive = CommentArchive.objects.get()
+    assert news.comments_archive == archive
+    assert archive.table == f'news_comment_{news.date:%Y%m}'
+    assert archive.comments == 2
+    assert set(Comment.objects.filter(news=news)) == {
+        busy, fresh_reply, later
+    }
+    assert not Notification.objects.filter(comment_id=old_reply.pk).exists()
+
+
+def test_second_run_moves_nothing(archived):
+    assert tiers.archive_old_comments() == 0
+
+
+def test_moves_whole_branches_in_batches(news, author, monkeypatch):
+    old = comment_at(news, author, 400)
+    comment_at(news, author, 390, parent=old)
+    comment_at(news, author, 380)
+    comment_at(news, author, 370)
+    fresh = comment_at(news, author, 1)
+    batches = []
+    archive_batch = tiers.archive_batch
+
+    def recorded(news_id, boundary, batch_size):
+        moved = archive_batch(news_id, boundary, batch_size)
+        news.refresh_from_db()
+        batches.append((moved, news.archived_comments))
+        return moved
+
+    monkeypatch.setattr(tiers, 'archive_batch', recorded)
+    moved = tiers.archive_news_comments(news.pk, batch_size=1, budget=1e-9)
+    assert moved == 4
+    # Ветка переносится целиком, счётчик верен после каждой пачки.
+    assert batches == [(2, 2), (1, 3), (1, 4), (0, 4)]
+    assert list(Comment.objects.filter(news=news)) == [fresh]
+
+
+def test_archive_tables_cache_expires(archived, settings):
+    assert tiers.archive_tables() == [cold_table()]
+    CommentArchive.objects.update(comments=0)
+    settings.COMMENTS_ARCHIVES_CACHE_TIMEOUT = 0
+    tiers.cache.delete(tiers.ARCHIVES_KEY)
+    assert tiers.archive_tables() == []
+    CommentArchive.objects.update(comments=2)
+    assert tiers.archive_tables() == [cold_table()]
+
+
+def test_command(thread):
+    out = StringIO()
+    call_command('tier_comments', '--days', '375', stdout=out)
+    assert 'Перенесено комментариев: 2.' in out.getvalue()
+
+
+@pytest.mark.parametrize('projections', (True, False))
+def test_detail_reads_both_tiers(
+    client, news, archived, settings, projections
+):
+    settings.NEWS_PROJECTIONS = projections
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    comments = response.context['comments']
+    assert [comment.pk for comment in comments] == [
+        comment.pk for comment in archived
+    ]
+    assert [comment.archived for comment in comments] == [
+        True, True, False, False, False
+    ]
+    assert comments[1].author_name == 'Читатель простой'
+
+
+def test_detail_streaming_reads_both_tiers(client, news, archived, settings):
+    settings.NEWS_DETAIL_STREAMING = True
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    content = b''.join(response.streaming_content).decode()
+    positions = [content.index(f'comment-{item.pk}"') for item in archived]
+    assert positions == sorted(positions)
+
+
+def test_stale_news_row_keeps_cold_comments(
+    client, news, thread, django_capture_on_commit_callbacks
+):
+    url = reverse('news:detail', args=(news.pk,))
+    client.get(url)
+    stale = news_cache.get(news.pk)
+    assert stale is not None
+    with django_capture_on_commit_callbacks(execute=True):
+        assert tiers.archive_old_comments() == 2
+    # Перенос сделал другой процесс: в кеше этого строка до переноса.
+    news_cache.set(news.pk, stale)
+    content = client.get(url).content.decode()
+    for comment in thread:
+        assert f'comment-{comment.pk}"' in content
+
+
+def test_hot_page_skips_cold_table(client, news, archived, settings):
+    settings.COMMENTS_PER_PAGE = 2
+    url = reverse('news:detail', args=(news.pk,))
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {'page': 2})
+    assert not queried(context, cold_table())
+    assert [comment.pk for comment in response.context['comments']] == [
+        comment.pk for comment in archived[2:4]
+    ]
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {'page': 1})
+    assert queried(context, cold_table())
+    assert [comment.pk for comment in response.context['comments']] == [
+        comment.pk for comment in archived[:2]
+    ]
+
+
+def test_archived_comments_are_read_only(client_with_login, news, archived):
+    old = archived[0]
+    response = client_with_login.get(reverse('news:detail', args=(news.pk,)))
+    content = response.content.decode()
+    assert reverse('news:edit', args=(old.pk,)) not in content
+    assert f'?reply_to={old.pk}' not in content
+    assert reverse('news:edit', args=(archived[2].pk,)) in content
+    response = client_with_login.get(reverse('news:edit', args=(old.pk,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_home_counts_archived_comments(client, news, archived, settings):
+    for projections in (True, False):
+        settings.NEWS_PROJECTIONS = projections
+        news_list = client.get(reverse('news:home')).context['news_list']
+        counts = {item.pk: item.comment_count for item in news_list}
+        assert counts[news.pk] == 5
+
+
+def test_my_comments_page_through_tiers(
+    client_with_login, author, archived, settings
+):
+    settings.MY_COMMENTS_PER_PAGE = 1
+    url = reverse('news:my_comments')
+    pages, cursor = [], None
+    while True:
+        response = client_with_login.get(
+            url, {'after': cursor} if cursor else {}
+        )
+        pages += response.context['comments']
+        cursor = response.context.get('next_cursor')
+        if cursor is None:
+            break
+    own = [comment for comment in archived if comment.author == author]
+    assert [comment.pk for comment in pages] == [
+        comment.pk
+        for comment in sorted(own, key=lambda c: c.created, reverse=True)
+    ]
+    assert pages[-1].archived
+    assert pages[-1].news.title == 'Заголовок'
+    assert response.context['total'] == len(own)
+
+
+def test_my_comments_hot_window_skips_cold_table(
+    client_with_login, news, author, archived, settings
+):
+    settings.MY_COMMENTS_PER_PAGE = 1
+    comment_at(news, author, 2)
+    comment_at(news, author, 3)
+    url = reverse('news:my_comments')
+    client_with_login.get(url)  # Общее число комментариев уже в кеше.
+    with CaptureQueriesContext(connection) as context:
+        response = client_with_login.get(url)
+    assert not queried(context, cold_table())
+    assert response.context['total'] == 5
+
+
+def test_deleting_news_deletes_cold_comments(news, archived):
+    table = cold_table()
+    News.objects.filter(pk=news.pk).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        assert cursor.fetchone()[0] == 0
+    assert CommentArchive.objects.get().comments == 0
+
+
+def test_deleting_user_deletes_cold_comments(
+    client, news, reader, archived, django_capture_on_commit_callbacks
+):
+    old, old_reply, busy, fresh_reply, later = archived
+    with django_capture_on_commit_callbacks(execute=True):
+        reader.delete()
+    news.refresh_from_db()
+    assert news.archived_comments == 1
+    assert CommentArchive.objects.get().comments == 1
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    content = response.content.decode()
+    assert 'Читатель простой' not in content
+    for comment in (old, busy, later):
+        assert f'comment-{comment.pk}"' in content
+
+
+def test_purge_archives_cold_comments(tmp_path, news, archived):
+    deleted, path = purge_news(news.pk, tmp_path)
+    assert deleted == 3
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        rows = [json.loads(line) for line in archive]
+    assert {row['id'] for row in rows if row['type'] == 'comment'} == {
+        comment.pk for comment in archived
+    }
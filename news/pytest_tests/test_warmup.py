@@ -0,0 +1,119 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.db import OperationalError
+from django.urls import get_resolver, reverse
+
+from news import warmup
+from news.cache import news_cache
+from news.models import News
+from news.views import NewsDetail
+from yanews.asgi import application
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def cold(monkeypatch):
+    """Каждый тест начинает с непрогретого процесса."""
+    monkeypatch.setattr(warmup, 'report', {})
+
+
+def named_urls(namespace):
+    patterns = get_resolver().namespace_dict[namespace][1].url_patterns
+    return [pattern for pattern in patterns if pattern.name]
+
+
+def test_warm_up_runs_all_stages(news, comment):
+    report = warmup.warm_up()
+    assert list(report) == ['connections', 'urls', 'templates', 'caches']
+    assert report['urls']['count'] == sum(
+        len(named_urls(namespace))
+        for namespace in settings.WARMUP_URL_NAMESPACES
+    )
+    assert report['templates']['count'] > 0
+    newest = News.objects.count()
+    assert report['caches']['count'] == min(
+        newest, settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    assert news_cache.get(news.pk) is not None
+
+
+def test_warm_up_runs_once(news, django_assert_num_queries):
+    warmup.warm_up()
+    with django_assert_num_queries(0):
+        warmup.warm_up()
+
+
+def test_warm_up_skips_view_counter(news, view_counter):
+    warmup.warm_up()
+    assert view_counter.pending_for(news.pk) == 0
+
+
+def test_warm_up_fills_page_cache(client, news, settings, monkeypatch):
+    settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT = 60
+    warmup.warm_up()
+    monkeypatch.setattr(NewsDetail, 'render_shared_page', pytest.fail)
+    response = client.get(reverse('news:detail', args=(news.pk,)))
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_ready(client, news):
+    response = client.get('/ready/')
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['ready'] is True
+    assert 'caches' in response.json()['warmup']
+
+
+def test_not_ready_while_warming(client):
+    with warmup._lock:
+        response = client.get('/ready/')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert warmup.report == {}
+
+
+def test_not_ready_without_database(client, monkeypatch):
+    def fail():
+        raise OperationalError('база недоступна')
+
+    monkeypatch.setattr(warmup, 'open_connections', fail)
+    response = client.get('/ready/')
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'ready': False, 'error': 'база недоступна'}
+
+
+def run_lifespan():
+    messages = iter((
+        {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+    ))
+    sent = []
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        sent.append(message['type'])
+
+    asyncio.run(application({'type': 'lifespan'}, receive, send))
+    return sent
+
+
+def test_lifespan_warms_up(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, 'warm_up', lambda: calls.append(1))
+    assert run_lifespan() == [
+        'lifespan.startup.complete', 'lifespan.shutdown.complete'
+    ]
+    assert calls == [1]
+
+
+def test_lifespan_survives_failed_warm_up(monkeypatch):
+    def fail():
+        raise OperationalError('база недоступна')
+
+    monkeypatch.setattr(warmup, 'warm_up', fail)
+    assert run_lifespan() == [
+        'lifespan.startup.complete', 'lifespan.shutdown.complete'
+    ]
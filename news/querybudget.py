@@ -0,0 +1,60 @@
+"""
+Бюджеты числа SQL-запросов на обработку одного запроса к сайту.
+
+Бюджет view задаётся декоратором query_budget или в настройке
+QUERY_BUDGETS по имени URL ('news:detail'). QueryBudgetMiddleware
+считает запросы через execute_wrapper всех подключений и при
+превышении бюджета либо бросает QueryBudgetExceeded
+(QUERY_BUDGET_RAISE = True, включено в тестах), либо пишет
+предупреждение с повторяющимися запросами - обычно это N+1.
+"""
+import re
+from collections import Counter
+
+SKIPPED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """SQL без литералов и с одинаковыми списками IN (...)."""
+    sql = LITERALS.sub('?', sql)
+    sql = PLACEHOLDER_LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def query_budget(queries):
+    """Задаёт view бюджет в queries SQL-запросов."""
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+class QueryRecorder:
+    """execute_wrapper, собирающий отпечатки выполненных запросов."""
+
+    def __init__(self):
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(SKIPPED):
+            self.fingerprints[fingerprint(sql)] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.fingerprints.values())
+
+    def duplicates(self, limit=5):
+        """Самые частые повторяющиеся запросы: [(отпечаток, раз), ...]."""
+        return [
+            (sql, count)
+            for sql, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
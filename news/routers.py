@@ -0,0 +1,97 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_use_replicas = ContextVar('use_replicas', default=False)
+_lag_cache = {}
+
+
+@contextmanager
+def use_replicas():
+    """Разрешает чтение с реплик внутри блока with."""
+    token = _use_replicas.set(True)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+def _sqlite_file(alias):
+    database = connections.databases[alias]
+    if not database['ENGINE'].endswith('sqlite3'):
+        return None
+    name = str(database['NAME'])
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    path = Path(name)
+    return path if path.is_file() else None
+
+
+def replica_lag(alias):
+    """
+    Оценивает отставание реплики от основной базы в секундах.
+
+    Для файловых копий SQLite это разница времени изменения файлов,
+    для остальных движков отставание считается нулевым.
+    """
+    primary, replica = _sqlite_file(DEFAULT_DB_ALIAS), _sqlite_file(alias)
+    if primary is None or replica is None:
+        return 0.0
+    return max(0.0, primary.stat().st_mtime - replica.stat().st_mtime)
+
+
+def cached_replica_lag(alias):
+    """Отставание реплики с кешированием на REPLICA_LAG_CHECK_INTERVAL."""
+    now = time.monotonic()
+    checked_at, lag = _lag_cache.get(alias, (None, None))
+    if checked_at is None or now - checked_at > (
+        settings.REPLICA_LAG_CHECK_INTERVAL
+    ):
+        lag = replica_lag(alias)
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def available_replicas():
+    """Реплики, отставание которых не превышает REPLICA_MAX_LAG_SECONDS."""
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if cached_replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+    ]
+
+
+class ReplicaRouter:
+    """
+    Направляет чтение на реплики, а запись - на основную базу.
+
+    Реплики используются только внутри use_replicas() - его включает
+    ReplicaRoutingMiddleware для GET- и HEAD-запросов. Если все реплики
+    отстают сильнее допустимого, чтение идёт в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replicas.get():
+            return None
+        replicas = available_replicas()
+        if not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
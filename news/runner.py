@@ -0,0 +1,19 @@
+from django.test.runner import DiscoverRunner
+
+from .counters import view_counter
+
+
+class NewsTestRunner(DiscoverRunner):
+    """
+    Тестовый раннер, который останавливает счётчик просмотров
+    до удаления тестовых баз.
+
+    Иначе фоновый поток счётчика, запущенный первым просмотром новости
+    в тестах, запишет буфер при выходе из процесса уже в рабочую базу:
+    к этому времени DATABASES снова указывает на неё.
+    """
+
+    def teardown_databases(self, old_config, **kwargs):
+        view_counter.stop()
+        view_counter.clear()
+        super().teardown_databases(old_config, **kwargs)
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feeds, tiers
+from .cache import invalidate_comments, invalidate_comments_count, news_cache
+from .models import Comment, News
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_news_cache(sender, instance, **kwargs):
+    """Сбрасывает изменённую или удалённую новость из кеша процесса."""
+    news_cache.invalidate(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_news_page(sender, instance, **kwargs):
+    """Сбрасывает закешированную страницу новости после фиксации."""
+    news_id = instance.pk
+    transaction.on_commit(lambda: invalidate_comments(news_id))
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_feeds(sender, instance, **kwargs):
+    """Начинает новое поколение лент новостей."""
+    feeds.invalidate()
+
+
+@receiver(post_delete, sender=News)
+def delete_cold_comments(sender, instance, **kwargs):
+    """Удаляет перенесённые в холодную таблицу комментарии новости."""
+    tiers.delete_cold(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def rename_comment_authors(sender, instance, created, update_fields, **kwargs):
+    """
+    Обновляет имя автора в его комментариях обоих хранилищ
+    и сбрасывает кеши страниц, где они показаны.
+    """
+    if created or (
+        update_fields is not None
+        and instance.USERNAME_FIELD not in update_fields
+    ):
+        return
+    news_ids = tiers.rename_author(instance.pk, instance.get_username())
+
+    def invalidate():
+        for news_id in news_ids:
+            invalidate_comments(news_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_cold_author_comments(sender, instance, **kwargs):
+    """
+    Удаляет перенесённые в холодные таблицы комментарии удалённого
+    пользователя: горячие удалил каскад.
+    """
+    news_ids = tiers.delete_author(instance.pk)
+
+    def invalidate():
+        for news_id in news_ids:
+            invalidate_comments(news_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comments_cache(sender, instance, **kwargs):
+    """Сбрасывает кеш комментариев новости после фиксации транзакции."""
+    news_id = instance.news_id
+    transaction.on_commit(lambda: invalidate_comments(news_id))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_user_comments_count(sender, instance, **kwargs):
+    """Сбрасывает кешированное число комментариев автора."""
+    if not kwargs.get('created', True):
+        return
+    author_id = instance.author_id
+    transaction.on_commit(lambda: invalidate_comments_count(author_id))
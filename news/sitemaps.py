@@ -0,0 +1,156 @@
+"""
+Статическая карта сайта для миллионов новостей.
+
+Новости делятся на шарды по диапазонам id: в шард N попадают id
+от N * size + 1 до (N + 1) * size, так что в шарде не больше size
+адресов, а удаление или добавление новости затрагивает только её шард.
+Первый проход читает только (id, date) с итерацией по ключу и считает
+контрольную сумму каждого шарда; файлы переписываются лишь для шардов,
+сумма которых изменилась с прошлого запуска (она хранится в manifest.json).
+Файлы записываются атомарно: во временный файл и затем os.replace().
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.urls import reverse
+
+from .models import News
+
+MANIFEST = 'manifest.json'
+INDEX = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def iterate_news(start=0, stop=None, batch_size=10000):
+    """Пары (id, date) с id в (start, stop] по возрастанию id."""
+    last = start
+    while True:
+        queryset = News.objects.filter(pk__gt=last)
+        if stop is not None:
+            queryset = queryset.filter(pk__lte=stop)
+        rows = list(
+            queryset.order_by('pk').values_list('pk', 'date')[:batch_size]
+        )
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][0]
+
+
+def shard_digests(shard_size, compress):
+    """Контрольная сумма, число адресов и lastmod каждого шарда."""
+    shards = {}
+    for pk, date in iterate_news():
+        shard = str((pk - 1) // shard_size)
+        if shard not in shards:
+            shards[shard] = [hashlib.sha1(str(compress).encode()), 0, date]
+        digest = shards[shard]
+        digest[0].update(f'{pk}:{date}\n'.encode())
+        digest[1] += 1
+        digest[2] = max(digest[2], date)
+    return {
+        shard: {
+            'digest': digest.hexdigest(),
+            'count': count,
+            'lastmod': lastmod.isoformat(),
+        }
+        for shard, (digest, count, lastmod) in shards.items()
+    }
+
+
+def shard_name(shard, compress):
+    return f'sitemap-{shard}.xml' + ('.gz' if compress else '')
+
+
+@contextmanager
+def atomic_write(path, compress=False):
+    """Файл для записи текста, который появится на месте path целиком."""
+    handle, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as raw:
+            stream = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+            with stream:
+                yield stream
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_shard(path, shard, shard_size, base_url, compress):
+    start = int(shard) * shard_size
+    with atomic_write(path, compress) as stream:
+        stream.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<urlset xmlns="{XMLNS}">'.encode()
+        )
+        for pk, date in iterate_news(start, start + shard_size):
+            location = escape(base_url + reverse('news:detail', args=(pk,)))
+            stream.write(
+                f'<url><loc>{location}</loc>'
+                f'<lastmod>{date.isoformat()}</lastmod></url>'.encode()
+            )
+        stream.write(b'</urlset>')
+
+
+def write_index(path, shards, files_url, compress):
+    with atomic_write(path) as stream:
+        stream.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<sitemapindex xmlns="{XMLNS}">'.encode()
+        )
+        for shard in sorted(shards, key=int):
+            location = escape(files_url + shard_name(shard, compress))
+            stream.write(
+                f'<sitemap><loc>{location}</loc>'
+                f'<lastmod>{shards[shard]["lastmod"]}</lastmod>'
+                '</sitemap>'.encode()
+            )
+        stream.write(b'</sitemapindex>')
+
+
+def build(root, base_url, files_url, shard_size, compress=False):
+    """
+    Обновляет карту сайта в каталоге root.
+
+    Возвращает словарь со списками записанных, пропущенных
+    и удалённых шардов.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST
+    previous = {}
+    if manifest_path.exists():
+        previous = json.loads(manifest_path.read_text())
+    if previous.get('shard_size') != shard_size:
+        previous = {}
+    old_shards = previous.get('shards', {})
+    shards = shard_digests(shard_size, compress)
+    result = {'written': [], 'skipped': [], 'removed': []}
+    for shard, info in shards.items():
+        path = root / shard_name(shard, compress)
+        old = old_shards.get(shard)
+        if old and old['digest'] == info['digest'] and path.exists():
+            result['skipped'].append(shard)
+            continue
+        write_shard(path, shard, shard_size, base_url, compress)
+        (root / shard_name(shard, not compress)).unlink(missing_ok=True)
+        result['written'].append(shard)
+    for shard in set(old_shards) - set(shards):
+        for compressed in (False, True):
+            (root / shard_name(shard, compressed)).unlink(missing_ok=True)
+        result['removed'].append(shard)
+    if result['written'] or result['removed'] or not (root / INDEX).exists():
+        write_index(root / INDEX, shards, files_url, compress)
+    with atomic_write(manifest_path) as stream:
+        stream.write(json.dumps(
+            {'shard_size': shard_size, 'shards': shards}
+        ).encode())
+    return result
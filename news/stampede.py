@@ -0,0 +1,98 @@
+"""
+Защита дорогих записей кеша от «давки» при истечении срока.
+
+Запись хранится в общем кеше Django вместе со временем вычисления и
+сроком свежести и живёт ещё CACHE_STALE_TIMEOUT секунд после него.
+Пересчитывает значение только процесс, захвативший блокировку через
+cache.add(). В memcached и redis эта операция атомарна, для файлового
+кеша нужен бэкенд news.cache_backends.FileBasedCache, поэтому блокировка
+работает и между процессами. Остальные
+в это время отдают устаревшую копию (stale-while-revalidate).
+
+Чтобы пересчёт не начинался у всех одновременно ровно в момент
+истечения, запись считается просроченной чуть раньше со случайным
+опережением, пропорциональным времени вычисления (XFetch, Vattani
+и др., «Optimal Probabilistic Cache Stampede Prevention»).
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def acquire(key):
+    """Пытается захватить блокировку пересчёта; возвращает её токен."""
+    token = uuid.uuid4().hex
+    if cache.add(lock_key(key), token, settings.CACHE_LOCK_TIMEOUT):
+        return token
+    return None
+
+
+def release(key, token):
+    # Не атомарно, но чужую блокировку удалим, только если наша истекла
+    # за время пересчёта и её успели захватить между get() и delete().
+    if cache.get(lock_key(key)) == token:
+        cache.delete(lock_key(key))
+
+
+def expired(expires, delta, now):
+    """Истекла ли запись с учётом вероятностного опережения."""
+    beta = settings.CACHE_EARLY_EXPIRATION_BETA
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def recompute(key, compute, timeout, token):
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(
+            key,
+            (value, delta, started + delta + timeout),
+            timeout + settings.CACHE_STALE_TIMEOUT,
+        )
+        return value
+    finally:
+        release(key, token)
+
+
+def get_or_compute(key, compute, timeout):
+    """
+    Возвращает значение из кеша, пересчитывая его не более чем в одном
+    процессе одновременно.
+
+    Если записи нет совсем, а пересчёт уже идёт в другом процессе, ждём
+    его результата до CACHE_LOCK_TIMEOUT секунд, а затем вычисляем
+    значение сами, не сохраняя его.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        if not expired(expires, delta, time.time()):
+            return value
+        token = acquire(key)
+        if token is None:
+            return value
+        return recompute(key, compute, timeout, token)
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while True:
+        token = acquire(key)
+        if token is not None:
+            entry = cache.get(key)
+            if entry is None:
+                return recompute(key, compute, timeout, token)
+            release(key, token)
+            return entry[0]
+        time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() >= deadline:
+            return compute()
@@ -0,0 +1,116 @@
+"""
+Профилирование холодного старта проекта.
+
+Старт замеряется в отдельном процессе с -X importtime: так в отчёт
+не попадают модули, уже загруженные в текущем процессе.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CHILD_CODE = 'from news.startup import child; child()'
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)$')
+
+
+def timed(timings, key, function):
+    """Оборачивает function, записывая время её работы в timings[key]."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[key] = time.perf_counter() - start
+    return wrapper
+
+
+def child():
+    """Выполняет django.setup() с замерами и печатает их в JSON."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    from django.apps.config import AppConfig
+
+    apps_timings = {}
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        timings = {}
+        config = timed(timings, 'create', create)(cls, entry)
+        config.import_models = timed(timings, 'models', config.import_models)
+        config.ready = timed(timings, 'ready', config.ready)
+        apps_timings[config.name] = timings
+        return config
+
+    AppConfig.create = classmethod(timed_create)
+    start = time.perf_counter()
+    import django
+    django.setup()
+    setup = time.perf_counter() - start
+
+    from django.urls import resolve, reverse
+    start = time.perf_counter()
+    resolve('/')
+    urls = time.perf_counter() - start
+    modules = set(sys.modules)
+    start = time.perf_counter()
+    reverse('news:home')
+    reverse_time = time.perf_counter() - start
+    json.dump(
+        {
+            'setup': setup,
+            'urls': urls,
+            'reverse': reverse_time,
+            'apps': apps_timings,
+            'modules': sorted(modules),
+            'reverse_modules': sorted(set(sys.modules) - modules),
+        },
+        sys.stdout,
+    )
+
+
+def parse_importtime(output):
+    """Собственное время импорта каждого модуля в секундах."""
+    imports = {}
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            imports[match[2]] = int(match[1]) / 10 ** 6
+    return imports
+
+
+def profile(lean=False):
+    """
+    Замеряет холодный старт проекта.
+
+    Возвращает время django.setup(), время загрузки корневого URLconf
+    (первый resolve()) и первого reverse(), замеры создания, импорта
+    моделей и ready() каждого приложения, собственное время импорта
+    каждого модуля, список модулей, загруженных до reverse(),
+    и список модулей, которые загрузил он.
+    """
+    env = dict(os.environ, YANEWS_LEAN_STARTUP='1' if lean else '')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_CODE],
+        capture_output=True,
+        check=True,
+        cwd=BASE_DIR,
+        env=env,
+        text=True,
+    )
+    report = json.loads(result.stdout)
+    report['imports'] = parse_importtime(result.stderr)
+    return report
+
+
+def import_time_by_app(report):
+    """Суммарное время импорта модулей каждого приложения."""
+    totals = dict.fromkeys(report['apps'], 0.0)
+    for module, seconds in report['imports'].items():
+        for app in totals:
+            if module == app or module.startswith(app + '.'):
+                totals[app] += seconds
+                break
+    return totals
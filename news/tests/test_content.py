@@ -1,6 +1,6 @@
 # news/tests/test_content.py
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 # Импортируем функцию для получения модели пользователя.
 from django.contrib.auth import get_user_model
 # Импортируем функцию reverse(), она понадобится для получения адреса страницы.
@@ -84,6 +84,8 @@ class TestDetailPage(TestCase):
             # И сохраняем эти изменения.
             comment.save()
 
+    # Страница из кеша отдаётся без контекста.
+    @override_settings(NEWS_DETAIL_PAGE_CACHE_TIMEOUT=None)
     def test_comments_order(self):
         response = self.client.get(self.detail_url)
         # Проверяем, что объект новости находится в словаре контекста
@@ -0,0 +1,450 @@
+"""
+Горячее и холодное хранилища комментариев.
+
+Таблица news_comment и её индексы растут вместе со всей историей
+обсуждений, хотя старые комментарии почти никто не читает. Команда
+tier_comments переносит комментарии старше COMMENTS_HOT_DAYS дней
+в холодные таблицы по месяцу публикации новости (news_comment_ГГГГММ,
+реестр - модель CommentArchive). Так объём горячей таблицы и её
+индексов определяется комментариями за последние COMMENTS_HOT_DAYS
+дней, а не всей историей.
+
+Переносятся ветки верхнего уровня по порядку пути, пока во всей ветке
+нет комментариев новее границы. Поэтому первые News.archived_comments
+комментариев новости в порядке обхода дерева лежат в холодной таблице,
+а остальные - в горячей. Страница обсуждения обращается к холодной
+таблице, только если захватывает эти позиции, а «Мои комментарии» -
+только когда листают дальше горячего окна. Перенесённые комментарии
+доступны только для чтения, уведомления о них удаляются.
+
+Ветки переносятся пачками, каждая в своей короткой транзакции вместе
+со счётчиками, поэтому начало обсуждения остаётся в холодной таблице
+и между пачками. Размер пачки подстраивается под
+COMMENTS_TIER_LOCK_BUDGET, как при удалении новостей (news.archive).
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .archive import (
+    COMMENT_FIELDS, MAX_BATCH_SIZE, adaptive_batches, delete_ids,
+)
+from .cache import invalidate_comments, news_cache
+from .models import PATH_STEP, Comment, CommentArchive, News, Notification
+from .projections import CommentRow
+
+INDEXES = (
+    ('news_path', ('news_id', 'path')),
+    ('author_created', ('author_id', 'created')),
+)
+ARCHIVES_KEY = 'news:comment_archives'
+# Имена холодных таблиц не меняются: {id CommentArchive: таблица}.
+_tables = {}
+
+
+def quote(name):
+    return connection.ops.quote_name(name)
+
+
+def columns():
+    return [field.column for field in Comment._meta.concrete_fields]
+
+
+def hot_boundary():
+    """Комментарии старше этого времени можно переносить."""
+    return timezone.now() - timedelta(days=settings.COMMENTS_HOT_DAYS)
+
+
+def table_name(month):
+    return f'{Comment._meta.db_table}_{month:%Y%m}'
+
+
+def create_table(table):
+    """Создаёт холодную таблицу с колонками news_comment без ключей."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE {} AS SELECT {} FROM {} WHERE 1 = 0'.format(
+                quote(table),
+                ', '.join(map(quote, columns())),
+                quote(Comment._meta.db_table),
+            )
+        )
+        for suffix, fields in INDEXES:
+            cursor.execute('CREATE INDEX {} ON {} ({})'.format(
+                quote(f'{table}_{suffix}'),
+                quote(table),
+                ', '.join(map(quote, fields)),
+            ))
+
+
+def archive_table(archive_id):
+    table = _tables.get(archive_id)
+    if table is None:
+        table = CommentArchive.objects.values_list(
+            'table', flat=True
+        ).get(pk=archive_id)
+        _tables[archive_id] = table
+    return table
+
+
+def get_archive(month):
+    """Холодная таблица месяца; создаётся при первом обращении."""
+    archive = CommentArchive.objects.filter(month=month).first()
+    if archive is None:
+        archive = CommentArchive.objects.create(
+            month=month, table=table_name(month)
+        )
+        create_table(archive.table)
+    return archive
+
+
+def cold_prefix(news_id, boundary, limit=None):
+    """
+    Id комментариев новости, которые можно перенести: ветки верхнего
+    уровня по порядку пути до первой ветки с комментарием новее boundary.
+    С limit - только целые ветки, пока их набралось меньше limit id.
+    """
+    moved, branch, root = [], [], None
+    rows = Comment.objects.thread(news_id).values_list(
+        'pk', 'path', 'created'
+    )
+    for pk, path, created in rows.iterator():
+        if path[:PATH_STEP] != root:
+            moved += branch
+            if limit is not None and len(moved) >= limit:
+                return moved
+            branch, root = [], path[:PATH_STEP]
+        if created >= boundary:
+            return moved
+        branch.append(pk)
+    return moved + branch
+
+
+def move_comments(table, ids):
+    """Копирует комментарии в холодную таблицу и удаляет из горячей."""
+    names = ', '.join(map(quote, columns()))
+    for start in range(0, len(ids), MAX_BATCH_SIZE):
+        batch = ids[start:start + MAX_BATCH_SIZE]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {} ({}) SELECT {} FROM {} WHERE {} IN ({})'
+                .format(
+                    quote(table), names, names,
+                    quote(Comment._meta.db_table), quote('id'),
+                    ', '.join(['%s'] * len(batch)),
+                ),
+                batch,
+            )
+        delete_ids(Notification, batch, 'comment_id')
+        delete_ids(Comment, batch)
+
+
+@transaction.atomic
+def archive_batch(news_id, boundary, batch_size):
+    """
+    Переносит следующие целые ветки начала обсуждения (около batch_size
+    комментариев); возвращает число перенесённых комментариев.
+    """
+    news = News.objects.select_for_update().get(pk=news_id)
+    ids = cold_prefix(news_id, boundary, batch_size)
+    if not ids:
+        return 0
+    archive = news.comments_archive or get_archive(
+        news.date.replace(day=1)
+    )
+    move_comments(archive.table, ids)
+    News.objects.filter(pk=news_id).update(
+        archived_comments=F('archived_comments') + len(ids),
+        comments_archive=archive,
+    )
+    CommentArchive.objects.filter(pk=archive.pk).update(
+        comments=F('comments') + len(ids)
+    )
+    news_cache.invalidate(news_id)
+    transaction.on_commit(lambda: invalidate_comments(news_id))
+    invalidate_archive_tables()
+    return len(ids)
+
+
+def archive_news_comments(news_id, boundary=None, batch_size=None,
+                          budget=None):
+    """
+    Переносит старое начало обсуждения новости в холодную таблицу
+    месяца её публикации короткими транзакциями; возвращает число
+    перенесённых комментариев.
+    """
+    boundary = boundary or hot_boundary()
+    batch_size = min(
+        batch_size or settings.COMMENTS_TIER_BATCH_SIZE, MAX_BATCH_SIZE
+    )
+    return sum(adaptive_batches(
+        lambda size: archive_batch(news_id, boundary, size),
+        batch_size, budget or settings.COMMENTS_TIER_LOCK_BUDGET,
+    ))
+
+
+def archive_old_comments(boundary=None):
+    """Переносит старые комментарии всех новостей; возвращает их число."""
+    boundary = boundary or hot_boundary()
+    news_ids = Comment.objects.filter(created__lt=boundary).values_list(
+        'news_id', flat=True
+    ).order_by().distinct()
+    return sum(
+        archive_news_comments(news_id, boundary) for news_id in news_ids
+    )
+
+
+def cold_thread(news, start, stop):
+    """Комментарии новости с позиций [start, stop) холодной таблицы."""
+    comments = Comment.objects.raw(
+        'SELECT id, text, text_html, created, author_id, author_name, path '
+        'FROM {} WHERE news_id = %s ORDER BY path LIMIT %s OFFSET %s'.format(
+            quote(archive_table(news.comments_archive_id))
+        ),
+        (news.pk, stop - start, start),
+    )
+    return [
+        CommentRow(
+            comment.pk, comment.text, comment.text_html, comment.created,
+            comment.author_id, comment.author_name, comment.path, True,
+        )
+        for comment in comments
+    ]
+
+
+def split(news, start, stop):
+    """
+    Делит срез [start, stop) обсуждения на срезы холодной и горячей
+    таблиц; None - таблица для этого среза не нужна.
+    """
+    archived = news.archived_comments
+    cold = hot = None
+    if start < archived:
+        cold = (start, archived if stop is None else min(stop, archived))
+    if stop is None or stop > archived:
+        hot = (
+            max(start - archived, 0),
+            None if stop is None else stop - archived,
+        )
+    return cold, hot
+
+
+def refresh(news):
+    """
+    Перечитывает из базы, сколько комментариев новости перенесено и куда.
+
+    Строка новости в кеше процесса (news_cache) не знает о переносе,
+    сделанном другим процессом, и по ней холодная часть обсуждения
+    потерялась бы, причём уже в новом поколении кеша страницы.
+    """
+    news.archived_comments, news.comments_archive_id = (
+        News.objects.filter(pk=news.pk).values_list(
+            'archived_comments', 'comments_archive_id'
+        ).first() or (0, None)
+    )
+    return news
+
+
+def thread(news, start, stop, hot):
+    """
+    Комментарии новости с позиций [start, stop) обоих хранилищ.
+
+    hot(start, stop) возвращает список комментариев горячей таблицы.
+    """
+    refresh(news)
+    cold_slice, hot_slice = split(news, start, stop)
+    if cold_slice is None:
+        return hot(*hot_slice)
+    comments = cold_thread(news, *cold_slice)
+    if hot_slice is not None:
+        comments += hot(*hot_slice)
+    return comments
+
+
+def load_archive_tables():
+    """Непустые холодные таблицы."""
+    return list(
+        CommentArchive.objects.filter(comments__gt=0)
+        .values_list('table', flat=True)
+    )
+
+
+def archive_tables():
+    """
+    Непустые холодные таблицы для чтения; список кешируется
+    на COMMENTS_ARCHIVES_CACHE_TIMEOUT секунд или до переноса.
+    """
+    return cache.get_or_set(
+        ARCHIVES_KEY, load_archive_tables,
+        settings.COMMENTS_ARCHIVES_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_archive_tables():
+    transaction.on_commit(lambda: cache.delete(ARCHIVES_KEY))
+
+
+def cold_user_comments(user_id, cursor, limit):
+    """
+    Комментарии пользователя из всех холодных таблиц, новые сверху,
+    с новостью (id и заголовок), старше курсора (created, id).
+    """
+    tables = archive_tables()
+    if not tables:
+        return []
+    condition, params = 'c.author_id = %s', [user_id]
+    if cursor is not None:
+        created, pk = cursor
+        created = connection.ops.adapt_datetimefield_value(created)
+        condition += ' AND (c.created < %s OR (c.created = %s AND c.id < %s))'
+        params += [created, created, pk]
+    selects = [
+        'SELECT * FROM (SELECT c.id, c.news_id, c.text, c.text_html, '
+        'c.created, n.title AS news_title FROM {} c JOIN {} n '
+        'ON n.id = c.news_id WHERE {} ORDER BY c.created DESC, c.id DESC '
+        'LIMIT %s) {}'.format(
+            quote(table), quote(News._meta.db_table), condition,
+            quote(f't{index}'),
+        )
+        for index, table in enumerate(tables)
+    ]
+    comments = list(Comment.objects.raw(
+        ' UNION ALL '.join(selects)
+        + ' ORDER BY created DESC, id DESC LIMIT %s',
+        (params + [limit]) * len(tables) + [limit],
+    ))
+    for comment in comments:
+        comment.news = News(pk=comment.news_id, title=comment.news_title)
+        comment.archived = True
+    return comments
+
+
+def cold_comments_count(user_id):
+    tables = archive_tables()
+    if not tables:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT SUM(n) FROM ({}) counts'.format(' UNION ALL '.join(
+                'SELECT COUNT(*) AS n FROM {} WHERE author_id = %s'.format(
+                    quote(table)
+                )
+                for table in tables
+            )),
+            [user_id] * len(tables),
+        )
+        return cursor.fetchone()[0] or 0
+
+
+def cold_rows(news_id):
+    """Перенесённые комментарии новости словарями полей COMMENT_FIELDS."""
+    archive_id = News.objects.filter(
+        pk=news_id, archived_comments__gt=0
+    ).values_list('comments_archive', flat=True).first()
+    if archive_id is None:
+        return []
+    comments = Comment.objects.raw(
+        'SELECT {} FROM {} WHERE news_id = %s ORDER BY path'.format(
+            ', '.join(map(quote, COMMENT_FIELDS)),
+            quote(archive_table(archive_id)),
+        ),
+        (news_id,),
+    )
+    return [
+        {name: getattr(comment, name) for name in COMMENT_FIELDS}
+        for comment in comments
+    ]
+
+
+def rename_author(user_id, name):
+    """
+    Записывает новое имя автора в его комментарии обоих хранилищ;
+    возвращает id новостей, где что-то изменилось.
+    """
+    renamed = Comment.objects.filter(author_id=user_id).exclude(
+        author_name=name
+    )
+    news_ids = set(
+        renamed.values_list('news_id', flat=True).order_by().distinct()
+    )
+    renamed.update(author_name=name)
+    for table in load_archive_tables():
+        with connection.cursor() as cursor:
+            condition = 'WHERE author_id = %s AND author_name <> %s'
+            cursor.execute(
+                'SELECT DISTINCT news_id FROM {} {}'.format(
+                    quote(table), condition
+                ),
+                (user_id, name),
+            )
+            news_ids.update(news_id for news_id, in cursor.fetchall())
+            cursor.execute(
+                'UPDATE {} SET author_name = %s {}'.format(
+                    quote(table), condition
+                ),
+                (name, user_id, name),
+            )
+    return news_ids
+
+
+def delete_cold(news):
+    """Удаляет из холодной таблицы комментарии удалённой новости."""
+    if not news.archived_comments:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE news_id = %s'.format(
+                quote(archive_table(news.comments_archive_id))
+            ),
+            (news.pk,),
+        )
+    CommentArchive.objects.filter(pk=news.comments_archive_id).update(
+        comments=F('comments') - news.archived_comments
+    )
+    invalidate_archive_tables()
+
+
+def delete_author(user_id):
+    """
+    Удаляет из холодных таблиц комментарии пользователя вместе
+    с ответами на них, как каскад в горячей таблице; возвращает id
+    новостей, где что-то удалено.
+    """
+    deleted = Counter()
+    archives = CommentArchive.objects.filter(comments__gt=0).values_list(
+        'pk', 'table'
+    )
+    for archive_id, table in archives:
+        in_table = Counter()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT news_id, path FROM {} WHERE author_id = %s '
+                'ORDER BY path'.format(quote(table)),
+                (user_id,),
+            )
+            for news_id, path in cursor.fetchall():
+                cursor.execute(
+                    'DELETE FROM {} WHERE news_id = %s AND path LIKE %s'
+                    .format(quote(table)),
+                    (news_id, path + '%'),
+                )
+                in_table[news_id] += cursor.rowcount
+        if not in_table:
+            continue
+        CommentArchive.objects.filter(pk=archive_id).update(
+            comments=F('comments') - sum(in_table.values())
+        )
+        deleted.update(in_table)
+    for news_id, count in deleted.items():
+        News.objects.filter(pk=news_id).update(
+            archived_comments=F('archived_comments') - count
+        )
+        news_cache.invalidate(news_id)
+    if deleted:
+        invalidate_archive_tables()
+    return set(deleted)
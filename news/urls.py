@@ -13,4 +13,15 @@ urlpatterns = [
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'my_comments/', views.MyComments.as_view(), name='my_comments'
+    ),
+    path('stats/', views.Stats.as_view(), name='stats'),
+    path('feed/rss/', views.NewsFeed.as_view(feed_format='rss'), name='rss'),
+    path(
+        'feed/atom/', views.NewsFeed.as_view(feed_format='atom'), name='atom'
+    ),
+    path(
+        'feed/json/', views.NewsFeed.as_view(feed_format='json'), name='json'
+    ),
 ]
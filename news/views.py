@@ -1,17 +1,46 @@
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from http import HTTPStatus
+from itertools import chain, islice
+
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F, Q
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import CommentForm
+from . import feeds, holes, tiers, warmup
+from .cache import (
+    comments_key, get_news, news_cache, page_key, user_comments_count
+)
+from .counters import view_counter
+from .forms import CommentForm, NewCommentForm
 from .models import Comment, News
+from .notifications import enqueue
+from .projections import home_news, news_comments
+from .stampede import get_or_compute
 
 
 class NewsList(generic.ListView):
-    """Список новостей."""
+    """
+    Список новостей.
+
+    При NEWS_PROJECTIONS = True вместо моделей в шаблон передаются
+    лёгкие кортежи NewsRow.
+    """
     model = News
     template_name = 'news/home.html'
+    context_object_name = 'news_list'
 
     def get_queryset(self):
         """
@@ -19,52 +48,264 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        if settings.NEWS_PROJECTIONS:
+            return home_news(settings.NEWS_COUNT_ON_HOME_PAGE)
+        return self.model.objects.annotate(
+            comment_count=Count('comment') + F('archived_comments')
+        ).order_by(*self.model._meta.ordering)[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
+
+
+class CommentThreadMixin:
+    """
+    Дерево комментариев к новости в контексте шаблона.
+
+    Комментарии выбираются одним запросом по индексу (news, path),
+    без таблицы пользователей: имя автора хранится в Comment.author_name.
+    Если задан COMMENTS_PER_PAGE, выводится одна страница дерева,
+    номер страницы берётся из GET-параметра page. Страницы дальше
+    COMMENTS_MAX_PAGE не существуют.
+    """
+
+    def get_page_number(self):
+        try:
+            page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+        if page > settings.COMMENTS_MAX_PAGE:
+            raise Http404('Нет такой страницы комментариев.')
+        return page
 
+    def get_comments_slice(self):
+        per_page = settings.COMMENTS_PER_PAGE
+        if not per_page:
+            return 0, None
+        start = (self.get_page_number() - 1) * per_page
+        return start, start + per_page + 1
 
-class NewsDetail(generic.DetailView):
+    def get_comments_queryset(self):
+        return Comment.objects.thread(self.object.pk)
+
+    def get_hot_comments(self, start, stop):
+        if settings.NEWS_PROJECTIONS:
+            return news_comments(self.object.pk, start, stop)
+        return list(self.get_comments_queryset()[start:stop])
+
+    def get_comments(self, start, stop):
+        """Начало старых обсуждений читается из холодной таблицы."""
+        return tiers.thread(self.object, start, stop, self.get_hot_comments)
+
+    def get_pagination_context(self, fetched):
+        """Номера соседних страниц; fetched - на один больше страницы."""
+        per_page = settings.COMMENTS_PER_PAGE
+        if not per_page:
+            return {}
+        page = self.get_page_number()
+        return {
+            'previous_page': page - 1 if page > 1 else None,
+            'next_page': page + 1 if fetched > per_page else None,
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments = self.get_comments(*self.get_comments_slice())
+        context.update(self.get_pagination_context(len(comments)))
+        context['comments'] = comments[:settings.COMMENTS_PER_PAGE]
+        return context
+
+
+class NewsDetail(CommentThreadMixin, generic.DetailView):
+    """
+    Страница новости с комментариями.
+
+    При NEWS_DETAIL_STREAMING = True страница отдаётся потоком: сначала
+    шапка и текст новости, затем комментарии порциями по
+    NEWS_DETAIL_STREAM_CHUNK штук, так что в памяти не собирается
+    весь HTML длинного обсуждения. При NEWS_PROJECTIONS = True
+    комментарии передаются в шаблон лёгкими кортежами CommentRow.
+
+    При NEWS_DETAIL_PAGE_CACHE_TIMEOUT страница кешируется целиком, одна
+    на всех пользователей, а шапка, счётчик просмотров, форма и ссылки
+    под комментариями подставляются вторым проходом (см. news.holes).
+
+    Просмотр учитывается в буфере view_counter без записи в базу;
+    в шаблон передаётся сумма сохранённых и ожидающих записи просмотров.
+    """
     model = News
     template_name = 'news/detail.html'
+    comments_template_name = 'includes/comments.html'
+    header_template_name = 'includes/header.html'
+    form_template_name = 'includes/comment_form.html'
+    comments_marker = mark_safe('<!-- comments -->')
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get(self, request, *args, **kwargs):
+        if (
+            not settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT
+            or settings.NEWS_DETAIL_STREAMING
+        ):
+            return super().get(request, *args, **kwargs)
+        self.object = self.get_object()
+        page = self.get_shared_page()
+        return HttpResponse(holes.fill(page, request, self.get_fragments()))
+
+    def get_shared_page(self):
+        return get_or_compute(
+            page_key(self.object.pk, *self.get_comments_slice()),
+            self.render_shared_page,
+            settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT,
         )
+
+    def warm_up(self):
+        """Заполняет общие кеши страницы, не засчитывая просмотр."""
+        self.object = self.get_object()
+        if (
+            settings.NEWS_DETAIL_PAGE_CACHE_TIMEOUT
+            and not settings.NEWS_DETAIL_STREAMING
+        ):
+            self.get_shared_page()
+        else:
+            self.get_comments(*self.get_comments_slice())
+
+    def render_shared_page(self):
+        """Страница без личных данных: рендерится без запроса."""
+        start, stop = self.get_comments_slice()
+        comments = super().get_comments(start, stop)
+        context = {
+            'object': self.object,
+            'news': self.object,
+            'comments': comments[:settings.COMMENTS_PER_PAGE],
+            'punch_holes': True,
+            **self.get_pagination_context(len(comments)),
+        }
+        return render_to_string(self.template_name, context)
+
+    def get_fragments(self):
+        """Личные фрагменты страницы для текущего запроса."""
+        context = self.get_personal_context()
+        user = self.request.user
+        return {
+            'header': render_to_string(
+                self.header_template_name, request=self.request
+            ),
+            'views': str(context['views']),
+            'form': render_to_string(
+                self.form_template_name, context, self.request
+            ) if user.is_authenticated else '',
+        }
+
+    def get_object(self, queryset=None):
+        """Новость берётся из кеша процесса news_cache."""
+        obj = get_news(self.kwargs['pk'])
+        if obj is None:
+            raise Http404('Новость не найдена.')
         return obj
 
+    def get_comments(self, start, stop):
+        """
+        Комментарии берутся из общего кеша на NEWS_DETAIL_CACHE_TIMEOUT
+        секунд; при истечении их пересчитывает только один процесс.
+        """
+        if settings.NEWS_DETAIL_STREAMING:
+            return []
+        compute = partial(super().get_comments, start, stop)
+        if not settings.NEWS_DETAIL_CACHE_TIMEOUT:
+            return compute()
+        return get_or_compute(
+            comments_key(self.object.pk, start, stop),
+            compute,
+            settings.NEWS_DETAIL_CACHE_TIMEOUT,
+        )
+
+    def get_personal_context(self):
+        view_counter.increment(self.object.pk)
+        context = {
+            'views': (
+                self.object.views + view_counter.pending_for(self.object.pk)
+            ),
+        }
+        if self.request.user.is_authenticated:
+            context['form'] = NewCommentForm(
+                news=self.object,
+                initial={'parent': self.request.GET.get('reply_to')},
+            )
+        return context
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_authenticated:
-            context['form'] = CommentForm()
+        context.update(self.get_personal_context())
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        if not settings.NEWS_DETAIL_STREAMING:
+            return super().render_to_response(context, **response_kwargs)
+        response_kwargs.setdefault('content_type', self.content_type)
+        return StreamingHttpResponse(
+            self.stream_content(context), **response_kwargs
+        )
+
+    def stream_content(self, context):
+        """Отдаёт страницу по частям: шапку, порции комментариев, хвост."""
+        context['comments_marker'] = self.comments_marker
+        page = get_template(self.template_name).render(context, self.request)
+        head, tail = page.split(self.comments_marker, 1)
+        yield head
+        comments_template = get_template(self.comments_template_name)
+        start, stop = self.get_comments_slice()
+        if stop is not None:
+            stop -= 1
+        cold, hot = tiers.split(tiers.refresh(self.object), start, stop)
+        comments = chain(
+            tiers.cold_thread(self.object, *cold) if cold else (),
+            self.get_comments_queryset()[slice(*hot)].iterator(
+                chunk_size=settings.NEWS_DETAIL_STREAM_CHUNK
+            ) if hot else (),
+        )
+        chunks = iter(
+            lambda: list(islice(comments, settings.NEWS_DETAIL_STREAM_CHUNK)),
+            []
+        )
+        empty = True
+        for chunk in chunks:
+            empty = False
+            yield comments_template.render({'comments': chunk}, self.request)
+        if empty:
+            yield comments_template.render({'comments': ()}, self.request)
+        yield tail
+
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentThreadMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
-    form_class = CommentForm
+    form_class = NewCommentForm
     template_name = 'news/detail.html'
 
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['news'] = self.object
+        return kwargs
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            enqueue(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,13 +324,15 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
+        """
+        Пользователь может работать только со своими комментариями,
+        кроме перенесённых в холодные таблицы (news.tiers).
+        """
         return self.model.objects.filter(author=self.request.user)
 
 
@@ -100,5 +343,157 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
-    """Удаление комментария."""
+    """
+    Удаление комментария вместе с ответами на него.
+
+    Если в ветке есть ответы других пользователей, комментарий
+    не удаляется: каскад удалил бы и чужие комментарии.
+    """
     template_name = 'news/delete.html'
+
+    def has_foreign_replies(self):
+        return Comment.objects.filter(
+            news_id=self.object.news_id, path__startswith=self.object.path
+        ).exclude(author_id=self.object.author_id).exists()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['has_foreign_replies'] = self.has_foreign_replies()
+        return context
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        if self.has_foreign_replies():
+            return self.render_to_response(
+                self.get_context_data(), status=HTTPStatus.CONFLICT
+            )
+        success_url = self.get_success_url()
+        self.object.delete()
+        return HttpResponseRedirect(success_url)
+
+
+class MyComments(LoginRequiredMixin, generic.ListView):
+    """
+    Комментарии текущего пользователя, новые сверху.
+
+    Страницы выбираются по ключу (author, created, id) по индексу
+    (author, created), а не через OFFSET, поэтому далёкие страницы
+    открываются так же быстро, как первая. Курсор - время и id
+    последнего комментария страницы.
+
+    Перенесённые в холодные таблицы комментарии (news.tiers)
+    подмешиваются, только когда страница выходит за горячее окно.
+    """
+    template_name = 'news/my_comments.html'
+    context_object_name = 'comments'
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    def encode_cursor(self, comment):
+        microseconds = (comment.created - self.epoch) // timedelta(
+            microseconds=1
+        )
+        return f'{microseconds}-{comment.pk}'
+
+    def decode_cursor(self):
+        try:
+            microseconds, pk = map(int, self.request.GET['after'].split('-'))
+            created = self.epoch + timedelta(microseconds=microseconds)
+        except (KeyError, ValueError, OverflowError):
+            return None
+        # id хранится в знаковом 64-битном целом.
+        if not 0 < pk < 2 ** 63:
+            return None
+        return created, pk
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(
+            author=self.request.user
+        ).select_related('news').only(
+            'text', 'text_html', 'created', 'news', 'news__title'
+        ).order_by('-created', '-pk')
+        cursor = self.decode_cursor()
+        if cursor is not None:
+            created, pk = cursor
+            queryset = queryset.filter(
+                Q(created__lt=created) | Q(created=created, pk__lt=pk)
+            )
+        limit = settings.MY_COMMENTS_PER_PAGE + 1
+        comments = list(queryset[:limit])
+        if len(comments) < limit or comments[-1].created < (
+            tiers.hot_boundary()
+        ):
+            comments = sorted(
+                comments + tiers.cold_user_comments(
+                    self.request.user.pk, cursor, limit
+                ),
+                key=lambda comment: (comment.created, comment.pk),
+                reverse=True,
+            )[:limit]
+        return comments
+
+    def get_context_data(self, **kwargs):
+        comments = self.object_list
+        per_page = settings.MY_COMMENTS_PER_PAGE
+        context = super().get_context_data(
+            object_list=comments[:per_page], **kwargs
+        )
+        context['total'] = user_comments_count(self.request.user.pk)
+        if len(comments) > per_page:
+            context['next_cursor'] = self.encode_cursor(comments[per_page - 1])
+        return context
+
+
+class Ready(generic.View):
+    """
+    Проверка готовности для балансировщика.
+
+    Отвечает 503, пока процесс прогревается или база недоступна,
+    и 200 с отчётом о прогреве (см. news.warmup), когда можно
+    принимать трафик.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            report = warmup.warm_up(blocking=False)
+            if report is None:
+                return JsonResponse({'ready': False}, status=503)
+            warmup.open_connections()
+        except DatabaseError as error:
+            return JsonResponse(
+                {'ready': False, 'error': str(error)}, status=503
+            )
+        return JsonResponse({'ready': True, 'warmup': report})
+
+
+class Stats(UserPassesTestMixin, generic.View):
+    """Статистика кешей и буферов текущего процесса для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'news_cache': news_cache.stats(),
+            'view_counter': {'pending': view_counter.pending_total()},
+        })
+
+
+@method_decorator(condition(etag_func=feeds.feed_etag), name='dispatch')
+class NewsFeed(generic.View):
+    """Лента последних новостей: rss, atom или json."""
+    feed_format = 'rss'
+
+    def get(self, request, *args, **kwargs):
+        generate, content_type = feeds.FORMATS[self.feed_format]
+        key = feeds.body_key(
+            self.feed_format,
+            request.build_absolute_uri('/'),
+            feeds.feed_etag(request),
+        )
+        body = cache.get(key)
+        if body is not None:
+            return HttpResponse(body, content_type=content_type)
+        return StreamingHttpResponse(
+            feeds.stream_and_store(generate(request), key),
+            content_type=content_type,
+        )
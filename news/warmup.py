@@ -0,0 +1,167 @@
+"""
+Прогрев процесса перед приёмом трафика.
+
+Без прогрева первые запросы после деплоя платят за подключение к базе,
+заполнение резолвера URL (с импортом лениво подключённых URLconf users
+и admin), компиляцию шаблонов и холодные кеши. warm_up() делает всё
+это заранее. Его вызывают хук post_worker_init gunicorn
+(yanews/gunicorn.conf.py) и событие lifespan startup ASGI-сервера
+(LifespanMiddleware в yanews/asgi.py). Если сервер не умеет ни того,
+ни другого, прогрев выполнит первая проверка адреса ready.
+Балансировщик начинает слать трафик в процесс, когда ready отвечает 200.
+
+Скомпилированные шаблоны сохраняются между запросами только при
+DEBUG = False, когда включён кеширующий загрузчик шаблонов.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpRequest
+from django.template import engines
+from django.urls import get_resolver, resolve, reverse
+
+from . import feeds
+from .cache import NEWS_FIELDS, news_cache
+from .models import News
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+report = {}
+
+
+def open_connections():
+    """Подключается ко всем базам из DATABASES, включая реплики."""
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def resolve_urls():
+    """Строит и разрешает все адреса из WARMUP_URL_NAMESPACES."""
+    resolver = get_resolver()
+    resolved = 0
+    for namespace in settings.WARMUP_URL_NAMESPACES:
+        for pattern in resolver.namespace_dict[namespace][1].url_patterns:
+            if not getattr(pattern, 'name', None):
+                continue
+            converters = getattr(pattern.pattern, 'converters', {})
+            resolve(reverse(
+                f'{namespace}:{pattern.name}',
+                kwargs={name: 1 for name in converters},
+            ))
+            resolved += 1
+    return resolved
+
+
+def compile_templates():
+    """Компилирует шаблоны проекта из каталогов TEMPLATES['DIRS']."""
+    compiled = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.dirs):
+            for path in sorted(directory.rglob('*.html')):
+                engine.get_template(path.relative_to(directory).as_posix())
+                compiled += 1
+    return compiled
+
+
+def warmup_request():
+    """Анонимный GET-запрос к главной от имени SITE_URL."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = reverse('news:home')
+    request.META = {'HTTP_HOST': urlsplit(settings.SITE_URL).netloc}
+    request.user = AnonymousUser()
+    return request
+
+
+def prime_caches():
+    """
+    Заполняет кеши главной страницы, ленты и страниц
+    NEWS_COUNT_ON_HOME_PAGE самых свежих новостей.
+    """
+    from .views import NewsDetail, NewsList
+
+    request = warmup_request()
+    NewsList.as_view()(request).render()
+    feeds.feed_etag(request)
+    rows = News.objects.order_by(*News._meta.ordering).values_list(
+        'pk', *NEWS_FIELDS
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    for pk, *row in rows:
+        news_cache.set(pk, tuple(row))
+        view = NewsDetail()
+        view.setup(request, pk=pk)
+        view.warm_up()
+    return len(rows)
+
+
+STAGES = (
+    ('connections', open_connections),
+    ('urls', resolve_urls),
+    ('templates', compile_templates),
+    ('caches', prime_caches),
+)
+
+
+def warm_up(blocking=True):
+    """
+    Прогревает процесс один раз; возвращает отчёт об этапах.
+
+    Отчёт - словарь {этап: {'count': ..., 'seconds': ...}}. Если прогрев
+    уже идёт в другом потоке, а blocking=False, возвращает None.
+    При ошибке отчёт остаётся пустым и следующий вызов начнёт заново.
+    """
+    if not _lock.acquire(blocking):
+        return None
+    try:
+        if not report:
+            stages = {}
+            for name, stage in STAGES:
+                start = time.perf_counter()
+                count = stage()
+                stages[name] = {
+                    'count': count,
+                    'seconds': round(time.perf_counter() - start, 4),
+                }
+            report.update(stages)
+        return dict(report)
+    finally:
+        _lock.release()
+
+
+class LifespanMiddleware:
+    """
+    Обработка протокола ASGI lifespan: прогрев на startup.
+
+    Django 3.2 обслуживает только http-запросы, поэтому события
+    lifespan обрабатываются здесь, а остальное передаётся приложению.
+    Прогрев выполняется в том же потоке, что и синхронные view,
+    так что открытое подключение к базе достаётся им. Ошибка прогрева
+    не останавливает сервер: его повторит проверка адреса ready.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await self.application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await sync_to_async(warm_up)()
+                except Exception:
+                    logger.exception('Не удалось прогреть процесс.')
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+app_name = admin.site.name
+
+urlpatterns = admin.site.get_urls()
@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from news.warmup import LifespanMiddleware  # noqa: E402
+
+application = LifespanMiddleware(django_application)
@@ -0,0 +1,30 @@
+from django.contrib.auth import views as auth_views
+from django.contrib.auth.forms import UserCreationForm
+from django.urls import path
+from django.views.generic import CreateView
+
+app_name = 'users'
+
+urlpatterns = [
+    path(
+        'login/',
+        auth_views.LoginView.as_view(),
+        name='login',
+    ),
+    path(
+        'logout/',
+        auth_views.LogoutView.as_view(
+            template_name='registration/logout.html'
+        ),
+        name='logout',
+    ),
+    path(
+        'signup/',
+        CreateView.as_view(
+            form_class=UserCreationForm,
+            success_url='/',
+            template_name='registration/signup.html',
+        ),
+        name='signup'
+    ),
+]
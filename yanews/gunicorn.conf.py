@@ -0,0 +1,16 @@
+"""
+Настройки gunicorn: gunicorn -c yanews/gunicorn.conf.py yanews.wsgi
+
+Каждый воркер прогревается (news.warmup) после загрузки приложения
+и до того, как начнёт принимать соединения.
+"""
+bind = '127.0.0.1:8000'
+
+
+def post_worker_init(worker):
+    from news.warmup import warm_up
+
+    try:
+        warm_up()
+    except Exception:
+        worker.log.exception('Не удалось прогреть воркер.')
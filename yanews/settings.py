@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -10,6 +11,8 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
+SITE_URL = 'http://localhost:8000'
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -22,6 +25,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.QueryBudgetMiddleware',
+    'news.middleware.CompressionMiddleware',
+    'news.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -30,6 +36,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Облегчённый профиль для продакшен-воркеров: без админки, сообщений
+# и статики, которые не нужны для обслуживания читателей.
+LEAN_STARTUP = os.environ.get('YANEWS_LEAN_STARTUP') == '1'
+LEAN_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+)
+if LEAN_STARTUP:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in LEAN_EXCLUDED_APPS
+    ]
+    MIDDLEWARE.remove('django.contrib.messages.middleware.MessageMiddleware')
+
 ROOT_URLCONF = 'yanews.urls'
 
 TEMPLATES = [
@@ -47,6 +67,10 @@ TEMPLATES = [
         },
     },
 ]
+if LEAN_STARTUP:
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.contrib.messages.context_processors.messages'
+    )
 
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
@@ -58,9 +82,46 @@ DATABASES = {
     }
 }
 
+# Псевдонимы баз из DATABASES, с которых можно читать в GET-запросах.
+# Например, read-only копия SQLite:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'db.replica.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['news.routers.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = 2
+REPLICA_LAG_CHECK_INTERVAL = 1
+REPLICA_STICKY_COOKIE = 'replica_sticky'
+REPLICA_STICKY_SECONDS = 5
+
+
+# Кеш должен быть общим для всех процессов, иначе защита от одновременного
+# пересчёта (news.stampede) работает только внутри процесса.
+if os.environ.get('YANEWS_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'news.cache_backends.FileBasedCache',
+            'LOCATION': os.environ['YANEWS_CACHE_DIR'],
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Алгоритм у ConfigurablePBKDF2PasswordHasher тот же, что у стандартного
+# PBKDF2PasswordHasher, поэтому имеющиеся хеши проверяются без миграции.
+PASSWORD_HASHERS = [
+    'news.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASHER_ITERATIONS = 260000
+# 0 - хешировать в процессе запроса, иначе размер пула процессов.
+PASSWORD_HASHING_PROCESSES = 0
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -80,3 +141,90 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+NEWS_PROJECTIONS = False
+
+NEWS_CACHE_MAX_BYTES = 4 * 1024 * 1024
+NEWS_CACHE_TTL = 60
+
+NEWS_FEED_SIZE = 20
+NEWS_FEED_CACHE_TIMEOUT = 24 * 60 * 60
+
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+# Адрес, по которому веб-сервер раздаёт файлы из SITEMAP_ROOT.
+SITEMAP_URL = '/sitemaps/'
+SITEMAP_BASE_URL = SITE_URL
+SITEMAP_SHARD_SIZE = 50000
+
+NEWS_ARCHIVE_ROOT = BASE_DIR / 'archive'
+NEWS_PURGE_BATCH_SIZE = 500
+NEWS_PURGE_LOCK_BUDGET = 0.05
+NEWS_PURGE_ADMIN_THRESHOLD = 1000
+
+NEWS_VIEWS_FLUSH_INTERVAL = 5
+NEWS_VIEWS_FLUSH_THRESHOLD = 1000
+
+# Останавливает счётчик просмотров до удаления тестовых баз.
+TEST_RUNNER = 'news.runner.NewsTestRunner'
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+NOTIFICATIONS_WEBHOOK_URL = None
+NOTIFICATIONS_WEBHOOK_TIMEOUT = 5
+NOTIFICATIONS_LEASE = 60
+NOTIFICATIONS_RETRY_DELAY = 30
+
+COMMENT_MAX_DEPTH = 5
+COMMENTS_PER_PAGE = None
+COMMENTS_MAX_PAGE = 10000
+# Комментарии старше стольких дней команда tier_comments переносит
+# в холодные таблицы по месяцам (news.tiers).
+COMMENTS_HOT_DAYS = 180
+COMMENTS_TIER_BATCH_SIZE = 500
+COMMENTS_TIER_LOCK_BUDGET = 0.05
+# Список холодных таблиц для чтения сбрасывается после переноса, но
+# в кеше отдельного процесса (locmem) живёт не дольше стольких секунд.
+COMMENTS_ARCHIVES_CACHE_TIMEOUT = 60
+
+MY_COMMENTS_PER_PAGE = 20
+MY_COMMENTS_COUNT_TIMEOUT = 60 * 60
+
+NEWS_DETAIL_CACHE_TIMEOUT = 30
+# Кеш всей страницы новости с личными фрагментами вторым проходом
+# (None - выключен). Страница из кеша отдаётся без response.context,
+# поэтому тесты, которые его читают, выключают кеш.
+NEWS_DETAIL_PAGE_CACHE_TIMEOUT = 60
+CACHE_STALE_TIMEOUT = 300
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_POLL_INTERVAL = 0.05
+CACHE_EARLY_EXPIRATION_BETA = 1.0
+
+# Бюджеты SQL-запросов по имени URL (см. news.querybudget). Не должны
+# зависеть от числа новостей и комментариев на странице.
+QUERY_BUDGETS = {
+    'news:home': 4,
+    'news:detail': 10,
+    # Плюс список холодных таблиц и запрос к ним за горячим окном.
+    'news:my_comments': 7,
+    'news:edit': 6,
+    # Проверка чужих ответов в ветке, затем каскад по собственным
+    # ответам автора: запрос на уровень.
+    'news:delete': 6 + 2 * COMMENT_MAX_DEPTH,
+    'news:stats': 3,
+    'news:rss': 3,
+    'news:atom': 3,
+    'news:json': 3,
+    'users:login': 9,
+    'users:logout': 2,
+    'users:signup': 4,
+}
+QUERY_BUDGET_RAISE = False
+
+NEWS_DETAIL_STREAMING = False
+NEWS_DETAIL_STREAM_CHUNK = 50
+
+COMPRESSION_MIN_LENGTH = 200
+
+STARTUP_TIME_BUDGET = 2
+
+# Пространства имён URL, которые прогрев (news.warmup) строит и разрешает.
+WARMUP_URL_NAMESPACES = ('news', 'users')
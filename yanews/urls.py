@@ -1,36 +1,33 @@
-from django.contrib import admin
-from django.contrib.auth import views as auth_views
-from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path
-from django.views.generic import CreateView
+from django.apps import apps
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+
+from news.views import Ready
+
+
+def lazy_include(route, urlconf_name, namespace):
+    """
+    Подключает URLconf с пространством имён, не импортируя его сразу.
+
+    Модуль загружается при первом разрешении адреса из этого
+    пространства имён или при первом reverse() любого адреса: reverse()
+    заполняет корневой резолвер и импортирует все вложенные URLconf.
+    Страницы строят адреса, поэтому импорт не исчезает, а переносится
+    со старта воркера на первый запрос или на прогрев (news.warmup).
+    """
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf_name,
+        app_name=namespace,
+        namespace=namespace,
+    )
+
 
 urlpatterns = [
+    path('ready/', Ready.as_view(), name='ready'),
     path('', include('news.urls')),
-    path('admin/', admin.site.urls),
+    lazy_include('auth/', 'yanews.auth_urls', 'users'),
 ]
 
-auth_urls = ([
-    path(
-        'login/',
-        auth_views.LoginView.as_view(),
-        name='login',
-    ),
-    path(
-        'logout/',
-        auth_views.LogoutView.as_view(
-            template_name='registration/logout.html'
-        ),
-        name='logout',
-    ),
-    path(
-        'signup/',
-        CreateView.as_view(
-            form_class=UserCreationForm,
-            success_url='/',
-            template_name='registration/signup.html',
-        ),
-        name='signup'
-    ),
-], 'users')
-
-urlpatterns += [path('auth/', include(auth_urls))]
+if apps.is_installed('django.contrib.admin'):
+    urlpatterns.append(lazy_include('admin/', 'yanews.admin_urls', 'admin'))